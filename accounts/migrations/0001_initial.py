@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-16 20:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_snippet_counts(apps, schema_editor):
+    Profile = apps.get_model("accounts", "Profile")
+    Snippet = apps.get_model("snippets", "Snippet")
+    counts = Snippet.objects.values("created_by").annotate(total=models.Count("id")).order_by()
+    Profile.objects.bulk_create(
+        [Profile(user_id=row["created_by"], snippet_count=row["total"]) for row in counts],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('snippets', '0004_tagusage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snippet_count', models.PositiveIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_snippet_counts, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,39 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import F
 
-# Create your models here.
+
+class ProfileManager(models.Manager):
+
+    def adjust_snippet_count(self, user, delta: int) -> None:
+        """
+        Add ``delta`` to the user's snippet counter with an in-database ``F()``
+        update, creating the row on first use.  Call inside the transaction that
+        creates or deletes the snippets so both commit together.
+        """
+        if not delta:
+            return
+        if delta > 0:
+            self.bulk_create([self.model(user=user)], ignore_conflicts=True)
+        rows = self.filter(user=user)
+        if delta < 0:
+            rows = rows.filter(snippet_count__gte=-delta)
+        rows.update(snippet_count=F("snippet_count") + delta)
+
+    def snippet_count(self, user) -> int:
+        return self.filter(user=user).values_list("snippet_count", flat=True).first() or 0
+
+    async def asnippet_count(self, user) -> int:
+        return await self.filter(user=user).values_list("snippet_count", flat=True).afirst() or 0
+
+
+class Profile(models.Model):
+    """Per-user data kept next to ``auth.User``, such as the maintained snippet counter."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
+    snippet_count = models.PositiveIntegerField(default=0)
+
+    objects = ProfileManager()
+
+    def __str__(self):
+        return f"Profile of {self.user}"
@@ -0,0 +1,46 @@
+"""
+Load test of the sync read views against their async variants under ASGI.
+
+Start a single uvicorn worker so the comparison is about concurrency inside
+one process, then run this script::
+
+    uvicorn snipbox.asgi:application --workers 1
+    python benchmarks/bench_async_views.py --username alice --password ... --snippet-id 1 --tag-id 1
+
+Each endpoint pair is hit with the same number of requests and concurrency and
+the two reports are printed next to each other.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load import add_common_arguments, login, run  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    parser.add_argument("--snippet-id", type=int, required=True)
+    parser.add_argument("--tag-id", type=int, required=True)
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    token = login(base_url, args.username, args.password)
+    paths = ["snippet/overview/", f"snippet/{args.snippet_id}/", "tags/", f"tags/{args.tag_id}/"]
+
+    report = []
+    for path in paths:
+        pair = {}
+        for variant, prefix in (("sync", ""), ("async", "async/")):
+            url = f"{base_url}/{prefix}{path}"
+            run(url, token, min(50, args.requests), args.concurrency)  # warm up
+            pair[variant] = run(url, token, args.requests, args.concurrency)
+        report.append({"path": path, **pair})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
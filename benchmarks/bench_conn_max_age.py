@@ -0,0 +1,40 @@
+"""
+Latency of ``snippet/<id>/`` under concurrent load, to compare per-request MySQL
+connections with persistent ones.
+
+Every request authenticates with JWT, which loads the user from MySQL, so even
+a cached detail response opens (or reuses) a database connection.  Run the
+server once per setting and compare the two reports::
+
+    # secrets.json: "DB_CONN_MAX_AGE": "0"
+    python benchmarks/bench_conn_max_age.py --username alice --password ... --snippet-id 1
+    # secrets.json: "DB_CONN_MAX_AGE": "60"
+    python benchmarks/bench_conn_max_age.py --username alice --password ... --snippet-id 1
+
+Use a multi-threaded WSGI server (``runserver`` or gunicorn with threads) so
+connections are actually reused per worker thread.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load import add_common_arguments, login, run  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    parser.add_argument("--snippet-id", type=int, required=True)
+    args = parser.parse_args()
+
+    token = login(args.base_url, args.username, args.password)
+    url = f"{args.base_url.rstrip('/')}/snippet/{args.snippet_id}/"
+    run(url, token, min(50, args.requests), args.concurrency)  # warm up connections and the cache
+    print(json.dumps(run(url, token, args.requests, args.concurrency), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Microbenchmark of ``SnippetOverviewSerializer`` over many rows: the precomputed
+detail URL field against DRF's ``HyperlinkedIdentityField``, which reverses the
+URL and builds an absolute URI for every row.
+
+No database or server is needed, the snippets are unsaved instances::
+
+    python benchmarks/bench_detail_urls.py --rows 10000
+
+Both outputs are rendered to JSON and checked to be byte-identical first.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "snipbox.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework import serializers  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from snippets.models import Snippet  # noqa: E402
+from snippets.serializers import SnippetOverviewSerializer  # noqa: E402
+from utils.custom_response import render_json  # noqa: E402
+
+
+class ReverseEveryRowSerializer(SnippetOverviewSerializer):
+    detail_url = serializers.HyperlinkedIdentityField(view_name="snippet-detail-api", lookup_field="id")
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["detail_url"] = str(data["detail_url"])
+        return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    snippets = [Snippet(id=pk, title=f"snippet {pk}") for pk in range(1, args.rows + 1)]
+    context = {"request": Request(APIRequestFactory().get("/snippet/overview/", HTTP_HOST="localhost"))}
+
+    def serialize(serializer_class):
+        return serializer_class(snippets, many=True, context=context).data
+
+    if render_json(serialize(SnippetOverviewSerializer)) != render_json(serialize(ReverseEveryRowSerializer)):
+        sys.exit("Outputs differ.")
+
+    report = {"rows": args.rows}
+    for name, serializer_class in (("reverse_per_row", ReverseEveryRowSerializer), ("precomputed", SnippetOverviewSerializer)):
+        best = min(timeit.repeat(lambda: serialize(serializer_class), number=1, repeat=args.repeat))
+        report[name] = {"best_seconds": round(best, 4), "rows_per_second": round(args.rows / best)}
+    report["speedup"] = round(report["reverse_per_row"]["best_seconds"] / report["precomputed"]["best_seconds"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Microbenchmark of rendering large overview payloads: ``FastJSONRenderer``
+(orjson when installed) against DRF's stdlib ``JSONRenderer``.
+
+No database or server is needed, the payload is the ``ApiResponse`` envelope of
+an overview page built in memory, plus a set of snippet details whose
+``created_on``/``updated_on`` are left as datetimes for the encoder::
+
+    python benchmarks/bench_renderer.py --rows 10000
+
+Both outputs are checked to be byte-identical first.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "snipbox.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from utils import renderers  # noqa: E402
+from utils.renderers import FastJSONRenderer  # noqa: E402
+
+
+def overview_payload(rows):
+    snippets = [
+        {"id": pk, "title": f"snippet {pk} ✓", "detail_url": f"http://localhost:8000/snippet/{pk}/"}
+        for pk in range(rows, 0, -1)
+    ]
+    return {
+        "success": True,
+        "message": "Snippets retrieved successfully.",
+        "data": {"total_snippets": rows, "snippets": snippets, "next_cursor": None, "prev_cursor": None},
+        "status_code": 200,
+    }
+
+
+def detail_payload(rows):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    snippets = [
+        {
+            "id": pk,
+            "title": f"snippet {pk}",
+            "note": "print('hello world')\n" * 4,
+            "created_on": start + timedelta(seconds=pk, microseconds=pk),
+            "updated_on": start + timedelta(seconds=2 * pk),
+            "tags": [{"id": 1, "title": "python"}, {"id": 2, "title": "perf"}],
+        }
+        for pk in range(1, rows + 1)
+    ]
+    return {"success": True, "message": "Snippets retrieved successfully.", "data": snippets, "status_code": 200}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = {"rows": args.rows, "orjson": renderers.orjson is not None}
+    for payload_name, payload in (("overview", overview_payload(args.rows)), ("details", detail_payload(args.rows))):
+        if FastJSONRenderer().render(payload) != JSONRenderer().render(payload):
+            sys.exit(f"Outputs differ for {payload_name}.")
+        result = {"bytes": len(JSONRenderer().render(payload))}
+        for name, renderer in (("json_renderer", JSONRenderer()), ("fast_json_renderer", FastJSONRenderer())):
+            best = min(timeit.repeat(lambda: renderer.render(payload), number=1, repeat=args.repeat))
+            result[name] = {"best_seconds": round(best, 4), "rows_per_second": round(args.rows / best)}
+        result["speedup"] = round(result["json_renderer"]["best_seconds"] / result["fast_json_renderer"]["best_seconds"], 2)
+        report[payload_name] = result
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
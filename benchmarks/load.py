@@ -0,0 +1,60 @@
+"""
+Tiny stdlib-only HTTP load generator shared by the benchmark scripts.
+
+Logs in through ``accounts/login/`` and fires authenticated GETs from a thread
+pool, reporting latency percentiles and throughput.
+"""
+import json
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def login(base_url, username, password):
+    request = urllib.request.Request(
+        f"{base_url.rstrip('/')}/accounts/login/",
+        data=json.dumps({"username": username, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["data"]["access"]
+
+
+def _timed_get(url, token):
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+        status = response.status
+    return time.perf_counter() - start, status
+
+
+def run(url, token, total_requests, concurrency):
+    """Return a stats dict (latencies in milliseconds) for ``total_requests`` GETs of ``url``."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _timed_get(url, token), range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "url": url,
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, status in results if status >= 400),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(quantiles[49], 2),
+        "p90_ms": round(quantiles[89], 2),
+        "p99_ms": round(quantiles[98], 2),
+        "req_per_s": round(total_requests / elapsed, 1),
+    }
+
+
+def add_common_arguments(parser):
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
@@ -24,11 +24,16 @@ with open('secrets.json') as secrets_file:
     secrets = json.load(secrets_file)
     
     
-def get_secret(setting, secret=secrets):
-    """Get secret setting or fail with ImproperlyConfigured"""
+_MISSING = object()
+
+
+def get_secret(setting, secret=secrets, default=_MISSING):
+    """Get secret setting, fall back to ``default`` if given, or fail with ImproperlyConfigured"""
     try:
         return secret[setting]
     except KeyError as e:
+        if default is not _MISSING:
+            return default
         raise ImproperlyConfigured(f"Set the {setting} setting") from e
 
 
@@ -102,9 +107,18 @@ DATABASES = {
         "PASSWORD": get_secret('DB_PASSWORD'),
         "HOST": get_secret('DB_HOST'),
         "PORT": get_secret('DB_PORT'),
+        # Keep connections open between requests instead of paying the TCP/TLS/auth
+        # handshake every time. CONN_MAX_AGE is also the max lifetime of a
+        # connection, keep it below MySQL's wait_timeout. 0 restores per-request
+        # connections (recommended when serving through ASGI).
+        "CONN_MAX_AGE": int(get_secret('DB_CONN_MAX_AGE', default=60)),
+        # Ping a reused connection at the start of each request and reconnect if
+        # the server dropped it, rather than failing the request.
+        "CONN_HEALTH_CHECKS": str(get_secret('DB_CONN_HEALTH_CHECKS', default="true")).lower() == "true",
         "OPTIONS": {
             "charset": "utf8mb4",
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+            "connect_timeout": int(get_secret('DB_CONNECT_TIMEOUT', default=5)),
         },
     }
 }
@@ -174,6 +188,11 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
+    # orjson-backed when orjson is installed, same bytes as DRF's JSONRenderer
+    "DEFAULT_RENDERER_CLASSES": (
+        "utils.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 
@@ -190,6 +209,75 @@ CACHE_TTL_SNIPPET_LIST = 60 * 5   # 5 min
 CACHE_TTL_SNIPPET_DETAIL = 60 * 10  # 10 min
 CACHE_TTL_TAG_LIST = 60 * 30       # 30 min
 CACHE_TTL_TAG_DETAIL = 60 * 15     # 15 min
+CACHE_TTL_SNIPPET_SEARCH = 60 * 5  # 5 min
+
+# Stale-while-revalidate (soft, hard) TTLs per key family, the CACHE_TTL_* values
+# above are the soft ones. Between the two an entry is served stale and rebuilt
+# in the background on one of CACHE_REFRESH_WORKERS threads; after the hard TTL
+# it is gone and the next request rebuilds it inline.
+CACHE_TTLS = {
+    "snippet_list": (CACHE_TTL_SNIPPET_LIST, CACHE_TTL_SNIPPET_LIST + 60 * 10),
+    "snippet_detail": (CACHE_TTL_SNIPPET_DETAIL, CACHE_TTL_SNIPPET_DETAIL + 60 * 20),
+    "snippet_search": (CACHE_TTL_SNIPPET_SEARCH, CACHE_TTL_SNIPPET_SEARCH + 60 * 5),
+    "tag_list": (CACHE_TTL_TAG_LIST, CACHE_TTL_TAG_LIST + 60 * 30),
+    "tag_detail": (CACHE_TTL_TAG_DETAIL, CACHE_TTL_TAG_DETAIL + 60 * 15),
+}
+CACHE_REFRESH_WORKERS = 4
+
+# Cache read responses as rendered JSON bytes (utils/response_cache.py) instead
+# of serialized Python data, so a hit skips unpickling and JSON encoding.
+CACHE_RENDERED_RESPONSES = True
+
+# Build the overview, tag list and tag detail payloads from .values() rows with
+# the plain-dict builders in snippets/fast_serializers.py instead of model
+# instances and DRF serializers.  The JSON is identical either way.
+FAST_READ_SERIALIZATION = True
+
+# Stampede protection for cache misses (utils/response_cache.py): one worker
+# rebuilds a key under a LOCK_TTL lock while the others poll for up to LOCK_WAIT
+# seconds. EARLY_REFRESH_BETA > 1 refreshes hot keys earlier, 0 disables it.
+CACHE_STAMPEDE = {
+    "LOCK_TTL": 10,
+    "LOCK_WAIT": 2.0,
+    "POLL_INTERVAL": 0.05,
+    "EARLY_REFRESH_BETA": 1.0,
+}
+
+# In-process LRU tier in front of Redis (utils/tiered_cache.py). TTL bounds how
+# stale a worker can be if it misses an invalidation message on CHANNEL.
+LOCAL_CACHE = {
+    "ENABLED": True,
+    "MAX_ENTRIES": 2048,
+    "TTL": 30,
+    "CHANNEL": "snipbox:cache:invalidate",
+}
+
+# Overview keyset pagination
+SNIPPET_PAGE_SIZE = 50
+SNIPPET_MAX_PAGE_SIZE = 200
+
+# Tag autocomplete (tags/suggest/), default and largest ?limit=
+TAG_SUGGEST_LIMIT = 10
+TAG_SUGGEST_MAX_LIMIT = 50
+# Per-user suggestion indexes kept in each worker (snippets/suggest.py).  An index
+# is rebuilt whenever the user's tags change; TTL only bounds idle memory.
+TAG_SUGGEST_USER_INDEXES = {
+    "MAX_USERS": 1000,
+    "TTL": 60 * 30,
+}
+
+# Delta sync (snippet/changes/).  Rows younger than SETTLE_SECONDS are held back
+# until the next call, so a write that commits a little after it stamped
+# updated_on is not skipped.  Sync tokens older than the tombstone retention are
+# rejected with a 410 and the client starts over.
+SNIPPET_SYNC = {
+    "SETTLE_SECONDS": 2,
+    "TOMBSTONE_RETENTION_DAYS": 30,
+}
+
+# NDJSON bulk import/export
+SNIPPET_IMPORT_CHUNK_SIZE = 500
+SNIPPET_EXPORT_BATCH_SIZE = 1000
 
 #Initilizing logger
 setup_logging()
\ No newline at end of file
@@ -0,0 +1,258 @@
+"""
+Async variants of the read endpoints for the ASGI entry point.
+
+DRF's ``APIView`` is sync only, so under uvicorn every request is handed to the
+sync thread pool.  These views are plain async Django views that use the async
+ORM (``aget``, ``acount``, ``async for``) and the async cache API, so a single
+worker can overlap many MySQL/Redis waits.  They return the same payloads and
+share the same cache keys as the views in ``views.py``.
+"""
+import logging
+import traceback
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .models import Snippet, SnippetTag, Tag
+from .pagination import InvalidCursor, build_keyset_page, decode_cursor, keyset_query
+from accounts.models import Profile
+from .views import (
+    overview_data,
+    overview_rows,
+    page_total,
+    tag_detail_message,
+    tag_detail_payload,
+    tag_filter,
+    tag_filter_payload,
+    tag_rows,
+    tag_snippet_rows,
+    tagged_snippets,
+    user_tag_payload,
+    user_tag_rows,
+)
+from .serializers import SnippetDetailSerializer
+from utils.custom_response import ApiResponse
+from utils.renderers import FastJSONRenderer
+from utils.response_cache import acached_or_build
+from utils.tiered_cache import tiered_cache
+from utils.cache_utils import (
+    aget_generation,
+    astore_snippet_count,
+    atag_detail_generation,
+    auser_tag_generation,
+    register_snippet_page,
+    snippet_count_key,
+    snippet_detail_key,
+    snippet_filter_key,
+    snippet_filter_scope,
+    snippet_list_scope,
+    snippet_page_key,
+    tag_detail_key,
+    user_tag_list_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of ``APIView`` for GET endpoints: JWT authentication
+    through simplejwt's own user lookup, so it accepts exactly the tokens the
+    sync views do, and ``ApiResponse`` rendered as JSON.
+    """
+
+    http_method_names = ["get"]
+    authenticator = JWTAuthentication()
+
+    async def authenticate(self, request):
+        header = self.authenticator.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.authenticator.get_raw_token(header)
+        if raw_token is None:
+            return None
+        try:
+            token = self.authenticator.get_validated_token(raw_token)
+            return await sync_to_async(self.authenticator.get_user)(token)
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+
+    @staticmethod
+    def finalize(response):
+        if not isinstance(response, Response):  # e.g. 405 from View.http_method_not_allowed
+            return response
+        response.accepted_renderer = FastJSONRenderer()
+        response.accepted_media_type = "application/json"
+        response.renderer_context = {}
+        return response.render()
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await self.authenticate(request)
+        if user is None:
+            return self.finalize(ApiResponse.unauthorized())
+        request.user = user
+        return self.finalize(await super().dispatch(request, *args, **kwargs))
+
+
+def _page_size(request):
+    try:
+        page_size = int(request.GET.get("page_size", settings.SNIPPET_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.SNIPPET_PAGE_SIZE
+    return max(1, min(page_size, settings.SNIPPET_MAX_PAGE_SIZE))
+
+
+class AsyncSnippetOverviewView(AsyncAPIView):
+
+    async def _total(self, user):
+        cache_key = snippet_count_key(user.pk)
+        total = await tiered_cache.aget(cache_key)
+        if total is None:
+            total = await Profile.objects.asnippet_count(user)
+            await astore_snippet_count(user.pk, total)
+        return {"total_snippets": total}
+
+    async def _build_page(self, request, cache_key, cursor, page_size):
+        snippets = overview_rows(Snippet.objects.filter(created_by=request.user))
+        rows = [row async for row in keyset_query(snippets, cursor, page_size)]
+        page = build_keyset_page(rows, cursor, page_size)
+        total = page_total(page, cursor)
+        if total is not None:
+            await astore_snippet_count(request.user.pk, total)
+        await sync_to_async(register_snippet_page)(request.user.pk, cache_key, {**page.bounds, "size": page_size})
+        return {
+            "snippets": overview_data(page.items, request),
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+
+    async def _build_filtered_page(self, request, titles, mode, cursor, page_size):
+        snippets = overview_rows(tagged_snippets(request.user, titles, mode))
+        rows = [row async for row in keyset_query(snippets, cursor, page_size)]
+        return tag_filter_payload(titles, mode, build_keyset_page(rows, cursor, page_size), request)
+
+    async def get(self, request):
+        try:
+            token = request.GET.get("cursor") or None
+            page_size = _page_size(request)
+            try:
+                cursor = decode_cursor(token) if token else None
+            except InvalidCursor as e:
+                return ApiResponse.error(message=str(e))
+            try:
+                tags = tag_filter(request.GET)
+            except ValueError as e:
+                return ApiResponse.error(message="Snippet overview failed.", errors={"mode": str(e)})
+
+            if tags is not None:
+                titles, mode = tags
+                generation = await aget_generation(snippet_filter_scope(request.user.pk))
+                cache_key = snippet_filter_key(request.user.pk, titles, mode, page_size, token, generation=generation)
+                return await acached_or_build(
+                    cache_key, partial(self._build_filtered_page, request, titles, mode, cursor, page_size),
+                    "snippet_list", message="Snippets retrieved successfully.", cached_message="Snippets retrieved from cache.",
+                    if_none_match=request.headers.get("If-None-Match"),
+                )
+
+            generation = await aget_generation(snippet_list_scope(request.user.pk))
+            extra = partial(self._total, request.user)
+            cache_key = snippet_page_key(request.user.pk, page_size, token, generation=generation)
+            return await acached_or_build(
+                cache_key, partial(self._build_page, request, cache_key, cursor, page_size), "snippet_list",
+                message="Snippets retrieved successfully.", cached_message="Snippets retrieved from cache.", extra=extra,
+                if_none_match=request.headers.get("If-None-Match"),
+            )
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+class AsyncSnippetDetailView(AsyncAPIView):
+
+    async def _build_detail(self, request, id):
+        snippet = await (
+            Snippet.objects.select_related("created_by").prefetch_related("tags").aget(id=id, created_by=request.user)
+        )
+        return SnippetDetailSerializer(snippet, context={"request": request}).data
+
+    async def get(self, request, id):
+        try:
+            cache_key = snippet_detail_key(request.user.id, id)
+            return await acached_or_build(
+                cache_key, partial(self._build_detail, request, id), "snippet_detail",
+                message="Snippet retrieved successfully.", cached_message="Snippet retrieved from cache.",
+                if_none_match=request.headers.get("If-None-Match"),
+            )
+        except ObjectDoesNotExist:
+            return ApiResponse.not_found(message="Snippet not found.")
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+class AsyncTagListView(AsyncAPIView):
+
+    async def _build_page(self, request, sort, page, page_size):
+        rows = user_tag_rows(request.user, sort)
+        offset = (page - 1) * page_size
+        items = [row async for row in rows[offset:offset + page_size]]
+        total = len(items) if page == 1 and len(items) < page_size else await rows.acount()
+        return user_tag_payload(items, total, page, page_size)
+
+    async def get(self, request):
+        try:
+            sort = "popular" if request.GET.get("sort") == "popular" else "title"
+            try:
+                page = max(1, int(request.GET.get("page", 1)))
+            except ValueError:
+                return ApiResponse.error(message="Tag list failed.", errors="page must be an integer.")
+            page_size = _page_size(request)
+
+            generation = await auser_tag_generation(request.user.pk)
+            cache_key = user_tag_list_key(request.user.pk, sort, page_size, page, generation=generation)
+            return await acached_or_build(
+                cache_key, partial(self._build_page, request, sort, page, page_size), "tag_list",
+                message="Tags retrieved successfully.", cached_message="Tags retrieved from cache.",
+                if_none_match=request.headers.get("If-None-Match"),
+            )
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+class AsyncTagDetailView(AsyncAPIView):
+
+    async def _build_detail(self, request, id, cursor, page_size):
+        tag = await tag_rows().aget(pk=id)
+        links = SnippetTag.objects.filter(tag_id=id, created_by=request.user)
+        rows = [row async for row in keyset_query(tag_snippet_rows(links), cursor, page_size, "snippet_id")]
+        return tag_detail_payload(tag, build_keyset_page(rows, cursor, page_size, "snippet_id"), request)
+
+    async def get(self, request, id):
+        try:
+            token = request.GET.get("cursor") or None
+            page_size = _page_size(request)
+            try:
+                cursor = decode_cursor(token) if token else None
+            except InvalidCursor as e:
+                return ApiResponse.error(message=str(e))
+
+            generation = await atag_detail_generation(id, request.user.id)
+            cache_key = tag_detail_key(id, request.user.id, page_size, token, generation=generation)
+            return await acached_or_build(
+                cache_key, partial(self._build_detail, request, id, cursor, page_size), "tag_detail",
+                message=tag_detail_message, cached_message=tag_detail_message,
+                if_none_match=request.headers.get("If-None-Match"),
+            )
+        except Tag.DoesNotExist:
+            return ApiResponse.not_found(message="Tag not found.")
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
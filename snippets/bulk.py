@@ -0,0 +1,137 @@
+"""
+NDJSON import/export of a user's snippets.
+
+Import validates each line with ``SnippetWriteSerializer`` and writes in chunks,
+one transaction per chunk.  Export walks the user's snippets in keyset batches
+so memory stays flat however large the archive is.
+"""
+import json
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from accounts.models import Profile
+from .models import Snippet, SnippetTag, Tag, TagDiff, TagUsage, normalize_tag_titles
+from .pagination import newer_than
+from .serializers import SnippetWriteSerializer
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 100
+
+
+def _bulk_create_snippets(snippets):
+    """
+    ``bulk_create`` only fills in primary keys on backends that can return rows
+    from a bulk insert.  MySQL can't, and the ids of a multi-row INSERT cannot
+    be told apart afterwards from those of a concurrent insert by the same
+    user, so there the rows are inserted one at a time, each returning its id,
+    still in the chunk's single transaction.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Snippet.objects.bulk_create(snippets)
+    for snippet in snippets:
+        snippet.save(force_insert=True)
+    return snippets
+
+
+def _import_chunk(user, rows):
+    """
+    Write one chunk of validated rows: snippets, tags and M2M links in one
+    transaction.  Returns the number of snippets and the chunk's ``TagDiff``.
+    """
+    with transaction.atomic():
+        titles = normalize_tag_titles(title for row in rows for title in row.get("tag_titles", []))
+        resolved, created = Tag.objects.resolve_titles(titles)
+        tags = dict(zip(titles, resolved))
+        snippets = _bulk_create_snippets([Snippet(created_by=user, title=row["title"], note=row["note"]) for row in rows])
+        links = [
+            SnippetTag(snippet_id=snippet.id, tag_id=tags[title].id, **SnippetTag.defaults_for(snippet))
+            for snippet, row in zip(snippets, rows)
+            for title in normalize_tag_titles(row.get("tag_titles", []))
+        ]
+        SnippetTag.objects.bulk_create(links, ignore_conflicts=True)
+        TagUsage.objects.adjust(user, Counter(link.tag_id for link in links))
+        Profile.objects.adjust_snippet_count(user, len(snippets))
+    return len(snippets), TagDiff(after=frozenset(link.tag_id for link in links), created=bool(created))
+
+
+def import_snippets(user, lines, on_chunk=None):
+    """
+    Import NDJSON ``lines`` (bytes or str) for ``user``.  Invalid lines are
+    skipped and reported; valid ones are written ``SNIPPET_IMPORT_CHUNK_SIZE``
+    at a time.  ``on_chunk`` is called with the ``TagDiff`` of every committed
+    chunk, so the caller knows what was written even if a later chunk fails.
+    """
+    imported = failed = 0
+    errors = []
+    chunk = []
+
+    def write(chunk):
+        nonlocal imported
+        count, tag_diff = _import_chunk(user, chunk)
+        imported += count
+        if on_chunk is not None:
+            on_chunk(tag_diff)
+
+    def report(line_no, error):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_no, "errors": error})
+
+    for line_no, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            report(line_no, "Invalid JSON.")
+            continue
+        if not isinstance(record, dict):
+            report(line_no, "Each line must be a JSON object.")
+            continue
+
+        serializer = SnippetWriteSerializer(data=record)
+        if not serializer.is_valid():
+            report(line_no, serializer.errors)
+            continue
+        chunk.append(serializer.validated_data)
+
+        if len(chunk) >= settings.SNIPPET_IMPORT_CHUNK_SIZE:
+            write(chunk)
+            chunk = []
+
+    if chunk:
+        write(chunk)
+    logger.info(f"Imported {imported} snippets for user {user.pk}, {failed} failed")
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+
+def export_snippets(user):
+    """
+    Yield the user's snippets as NDJSON lines, oldest first so that importing
+    the file again recreates them in the same order.
+    """
+    queryset = Snippet.objects.filter(created_by=user).values("id", "title", "note", "created_on", "updated_on")
+    batch_size = settings.SNIPPET_EXPORT_BATCH_SIZE
+    batch = list(queryset.order_by("created_on", "id")[:batch_size])
+    while batch:
+        tag_titles = {}
+        links = SnippetTag.objects.filter(snippet_id__in=[row["id"] for row in batch])
+        for snippet_id, title in links.values_list("snippet_id", "tag__title"):
+            tag_titles.setdefault(snippet_id, []).append(title)
+
+        for row in batch:
+            row["tag_titles"] = sorted(tag_titles.get(row["id"], []))
+            yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+        if len(batch) < batch_size:
+            break
+        last = batch[-1]
+        batch = list(newer_than(queryset, last["created_on"], last["id"])[:batch_size])
@@ -0,0 +1,63 @@
+"""
+Plain-dict builders for the hot read paths (overview, tag list, tag detail).
+
+The payloads are a few flat fields per object, so instead of instantiating
+model objects and running DRF's field machinery per row, the views fetch
+``.values()`` / named ``.values_list()`` rows and map them to dicts here.  The
+output is identical to ``SnippetOverviewSerializer``, ``TagSerializer`` and
+``TagUsageSerializer``; ``FAST_READ_SERIALIZATION`` switches back to the
+serializers.
+"""
+from rest_framework import serializers
+
+from .serializers import resolve_url_template
+
+OVERVIEW_FIELDS = ("id", "title", "created_on", "updated_on")
+_datetime = serializers.DateTimeField().to_representation
+TAG_FIELDS = ("id", "title")
+TAG_USAGE_FIELDS = ("tag_id", "tag__title", "snippet_count")
+
+
+def overview_items(rows, request) -> list:
+    """Rows with the ``OVERVIEW_FIELDS`` as attributes, as ``SnippetOverviewSerializer(many=True)`` renders them."""
+    prefix, suffix = resolve_url_template("snippet-detail-api", "id", request)
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "created_on": _datetime(row.created_on),
+            "updated_on": _datetime(row.updated_on),
+            "detail_url": f"{prefix}{row.id}{suffix}",
+        }
+        for row in rows
+    ]
+
+
+def tag_snippet_items(rows, request) -> list:
+    """``SnippetTag`` rows with ``snippet_id``, ``title`` and the timestamps as attributes, rendered like ``overview_items``."""
+    prefix, suffix = resolve_url_template("snippet-detail-api", "id", request)
+    return [
+        {
+            "id": row.snippet_id,
+            "title": row.title,
+            "created_on": _datetime(row.created_on),
+            "updated_on": _datetime(row.updated_on),
+            "detail_url": f"{prefix}{row.snippet_id}{suffix}",
+        }
+        for row in rows
+    ]
+
+
+def tag_item(row) -> dict:
+    """A ``Tag.objects.values("id", "title")`` row, as ``TagSerializer`` renders it."""
+    return {"id": row["id"], "title": row["title"]}
+
+
+def tag_items(rows) -> list:
+    return [tag_item(row) for row in rows]
+
+
+def tag_usage_items(rows) -> list:
+    """``values("tag_id", "tag__title", "snippet_count")`` rows of ``TagUsage``, as ``TagUsageSerializer`` renders them."""
+    return [{"id": row["tag_id"], "title": row["tag__title"], "snippet_count": row["snippet_count"]} for row in rows]
+
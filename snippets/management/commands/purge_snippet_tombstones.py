@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from snippets.models import SnippetTombstone
+from snippets.sync import tombstone_cutoff
+
+
+class Command(BaseCommand):
+    help = "Delete snippet tombstones older than SNIPPET_SYNC['TOMBSTONE_RETENTION_DAYS']. Run it daily, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        cutoff = tombstone_cutoff()
+        purged = 0
+        while True:
+            # Batches keep each DELETE (and its locks) short on a large table.
+            ids = list(
+                SnippetTombstone.objects.filter(deleted_on__lt=cutoff).values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not ids:
+                break
+            purged += SnippetTombstone.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} snippet tombstones."))
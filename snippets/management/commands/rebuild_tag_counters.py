@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from snippets.models import SnippetTag, TagUsage
+from utils.cache_utils import invalidate_all_tag_caches
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user TagUsage snippet counters from the snippet/tag links."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild the counters of this user id.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        links = SnippetTag.objects.all()
+        usages = TagUsage.objects.all()
+        if options["user"] is not None:
+            links = links.filter(created_by_id=options["user"])
+            usages = usages.filter(user_id=options["user"])
+
+        counts = links.values("created_by_id", "tag_id").annotate(snippet_count=Count("id")).order_by()
+        with transaction.atomic():
+            usages.delete()
+            TagUsage.objects.bulk_create(
+                (
+                    TagUsage(user_id=row["created_by_id"], tag_id=row["tag_id"], snippet_count=row["snippet_count"])
+                    for row in counts.iterator()
+                ),
+                batch_size=options["batch_size"],
+            )
+        invalidate_all_tag_caches()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {usages.count()} tag counters."))
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+FULLTEXT_INDEX = "snippets_sn_title_note_ft"
+
+
+def add_fulltext_index(apps, schema_editor):
+    # Django has no FULLTEXT index type, and only MySQL needs one; other
+    # backends use the in-memory fallback in snippets/search.py.
+    if schema_editor.connection.vendor != "mysql":
+        return
+    table = apps.get_model("snippets", "Snippet")._meta.db_table
+    schema_editor.execute(f"ALTER TABLE `{table}` ADD FULLTEXT INDEX `{FULLTEXT_INDEX}` (`title`, `note`)")
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    table = apps.get_model("snippets", "Snippet")._meta.db_table
+    schema_editor.execute(f"ALTER TABLE `{table}` DROP INDEX `{FULLTEXT_INDEX}`")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0002_alter_snippet_id_alter_tag_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
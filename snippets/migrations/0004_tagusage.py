@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-16 20:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_tag_usage(apps, schema_editor):
+    Snippet = apps.get_model("snippets", "Snippet")
+    TagUsage = apps.get_model("snippets", "TagUsage")
+    links = Snippet.tags.through.objects.values("snippet__created_by", "tag").annotate(total=models.Count("id")).order_by()
+    TagUsage.objects.bulk_create(
+        [TagUsage(user_id=row["snippet__created_by"], tag_id=row["tag"], snippet_count=row["total"]) for row in links],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0003_snippet_fulltext_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snippet_count', models.PositiveIntegerField(default=0)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usages', to='snippets.tag')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_usages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-snippet_count'], name='snippets_ta_user_id_b784e0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'tag'), name='unique_tag_usage_per_user')],
+            },
+        ),
+        migrations.RunPython(backfill_tag_usage, migrations.RunPython.noop),
+    ]
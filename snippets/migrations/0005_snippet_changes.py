@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-16 20:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0004_tagusage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnippetTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snippet_id', models.IntegerField()),
+                ('deleted_on', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='snippet',
+            index=models.Index(fields=['created_by', 'updated_on'], name='snippets_sn_created_cc720b_idx'),
+        ),
+        migrations.AddField(
+            model_name='snippettombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snippet_tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='snippettombstone',
+            index=models.Index(fields=['user', 'deleted_on'], name='snippets_sn_user_id_cb7edf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='snippettombstone',
+            index=models.Index(fields=['deleted_on'], name='snippets_sn_deleted_5d6138_idx'),
+        ),
+    ]
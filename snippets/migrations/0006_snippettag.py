@@ -0,0 +1,76 @@
+# Generated by Django 6.0.2 on 2026-10-16 21:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_link_owner(apps, schema_editor):
+    """Copy each snippet's owner and creation time onto its tag links."""
+    Snippet = apps.get_model("snippets", "Snippet")
+    SnippetTag = apps.get_model("snippets", "SnippetTag")
+    snippet = Snippet.objects.filter(pk=OuterRef("snippet_id"))
+    SnippetTag.objects.update(
+        created_by=Subquery(snippet.values("created_by")[:1]),
+        created_on=Subquery(snippet.values("created_on")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0005_snippet_changes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The auto-created M2M table already has exactly these columns and the
+        # (snippet_id, tag_id) unique index, so it is adopted as is.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='SnippetTag',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('snippet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='snippets.snippet')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='snippets.tag')),
+                    ],
+                    options={
+                        'db_table': 'snippets_snippet_tags',
+                        'unique_together': {('snippet', 'tag')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='snippet',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, related_name='snippets', through='snippets.SnippetTag', to='snippets.tag'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='snippettag',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='snippettag',
+            name='created_on',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_link_owner, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='snippettag',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='snippettag',
+            name='created_on',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='snippettag',
+            index=models.Index(fields=['tag', 'created_by', 'created_on'], name='snippets_sn_tag_id_ba129b_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0006_snippettag'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='snippettag',
+            name='snippets_sn_tag_id_ba129b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='snippettag',
+            index=models.Index(fields=['tag', 'created_by', 'created_on', 'snippet'], name='snippets_sn_tag_id_e045d3_idx'),
+        ),
+    ]
@@ -1,11 +1,81 @@
+from dataclasses import dataclass
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+
+
+def normalize_tag_titles(raw_titles) -> list:
+    """Strip, lowercase and de-duplicate tag titles, keeping first-seen order."""
+    titles = (raw_title.strip().lower() for raw_title in raw_titles)
+    return list(dict.fromkeys(title for title in titles if title))
+
+
+@dataclass(frozen=True)
+class TagDiff:
+    """
+    A snippet's tag ids before and after a write, whether the write inserted new
+    ``Tag`` rows and whether it changed the snippet's title, which tag detail
+    lists.  Tells which tag caches the write made stale.
+    """
+
+    before: frozenset = frozenset()
+    after: frozenset = frozenset()
+    created: bool = False
+    title_changed: bool = False
+
+    @property
+    def usage_changed(self) -> bool:
+        return self.before != self.after
+
+    @property
+    def detail_tag_ids(self) -> frozenset:
+        """Tags whose list of the user's snippets the write changed."""
+        if self.title_changed:
+            return self.before | self.after
+        return self.before ^ self.after
+
+
+class TagManager(models.Manager):
+
+    def resolve_titles(self, raw_titles) -> tuple:
+        """
+        Return ``(tags, created)``: a Tag for every title and, of those, the
+        ones that had to be inserted.  Runs in a constant number of queries: one
+        ``title__in`` lookup, one ``INSERT IGNORE`` for whatever was missing and
+        one re-fetch of those rows.
+
+        ``ignore_conflicts`` lets a concurrent writer win the race on the unique
+        ``title`` column.  The re-fetch is a locking read so, under MySQL's
+        REPEATABLE READ, it sees that writer's committed row instead of our
+        transaction's older snapshot.
+        """
+        titles = normalize_tag_titles(raw_titles)
+        if not titles:
+            return [], []
+
+        with transaction.atomic():
+            tags = {tag.title: tag for tag in self.filter(title__in=titles).order_by()}
+            missing = [title for title in titles if title not in tags]
+            if missing:
+                self.bulk_create([self.model(title=title) for title in missing], ignore_conflicts=True)
+                tags.update(
+                    (tag.title, tag) for tag in self.select_for_update().filter(title__in=missing).order_by()
+                )
+                for title in missing:
+                    if title not in tags:  # collation folded it onto an existing title
+                        tags[title] = self.select_for_update().get(title=title)
+        # A concurrent writer may have inserted some of ``missing`` first, they
+        # are new rows all the same.
+        return [tags[title] for title in titles], [tags[title] for title in missing]
 
 
 class Tag(models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=100, unique=True, db_index=True)
 
+    objects = TagManager()
+
     class Meta:
         ordering = ["title"]
         indexes = [
@@ -27,13 +97,110 @@ class Snippet(models.Model):
         on_delete=models.CASCADE,
         related_name="snippets",
     )
-    tags = models.ManyToManyField(Tag, blank=True, related_name="snippets")
+    tags = models.ManyToManyField(Tag, blank=True, related_name="snippets", through="SnippetTag")
 
     class Meta:
         ordering = ["-created_on"]
         indexes = [
             models.Index(fields=["title"]),
+            models.Index(fields=["created_by", "updated_on"]),  # delta sync (snippet/changes/)
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.created_by.username})"
+
+
+class SnippetTag(models.Model):
+    """
+    A snippet's link to one of its tags.  The snippet's owner and creation time
+    are copied onto it (neither ever changes) so "a user's snippets under a tag,
+    newest first" is one range of the ``(tag, created_by, created_on, snippet)``
+    index, the snippet id breaking ties as in every other snippet listing.  Add
+    links with ``through_defaults`` for both, see ``SnippetTag.defaults_for``.
+    """
+
+    snippet = models.ForeignKey(Snippet, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    created_on = models.DateTimeField()
+
+    class Meta:
+        db_table = "snippets_snippet_tags"  # the table of the former auto-created M2M
+        unique_together = [("snippet", "tag")]
+        indexes = [
+            models.Index(fields=["tag", "created_by", "created_on", "snippet"]),
+        ]
+
+    @staticmethod
+    def defaults_for(snippet) -> dict:
+        return {"created_by_id": snippet.created_by_id, "created_on": snippet.created_on}
+
+    def __str__(self):
+        return f"{self.snippet_id} -> {self.tag_id}"
+
+
+class SnippetTombstone(models.Model):
+    """
+    Left behind by a deleted snippet so delta sync (``snippet/changes/``) can
+    report the deletion.  Kept for ``SNIPPET_SYNC["TOMBSTONE_RETENTION_DAYS"]``,
+    see the ``purge_snippet_tombstones`` command.
+    """
+
+    snippet_id = models.IntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="snippet_tombstones")
+    deleted_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "deleted_on"]),
+            models.Index(fields=["deleted_on"]),
+        ]
+
+    def __str__(self):
+        return f"Deleted snippet {self.snippet_id} ({self.user.username})"
+
+
+class TagUsageManager(models.Manager):
+
+    def adjust(self, user, deltas: dict) -> None:
+        """
+        Apply ``{tag_id: delta}`` to the user's counters with in-database
+        ``F()`` updates, one UPDATE per distinct delta.  Call inside the
+        transaction that changes the snippet/tag links so both commit together.
+        """
+        deltas = {tag_id: delta for tag_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        increments = [tag_id for tag_id, delta in deltas.items() if delta > 0]
+        if increments:
+            self.bulk_create([self.model(user=user, tag_id=tag_id) for tag_id in increments], ignore_conflicts=True)
+
+        by_delta = {}
+        for tag_id, delta in deltas.items():
+            by_delta.setdefault(delta, []).append(tag_id)
+        for delta, tag_ids in by_delta.items():
+            rows = self.filter(user=user, tag_id__in=tag_ids)
+            if delta < 0:
+                rows = rows.filter(snippet_count__gte=-delta)
+            rows.update(snippet_count=F("snippet_count") + delta)
+
+
+class TagUsage(models.Model):
+    """How many of a user's snippets carry a tag, kept in step with ``Snippet.tags``."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tag_usages")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="usages")
+    snippet_count = models.PositiveIntegerField(default=0)
+
+    objects = TagUsageManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "tag"], name="unique_tag_usage_per_user"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-snippet_count"]),
         ]
 
     def __str__(self):
-        return f"{self.title} ({self.created_by.username})"
\ No newline at end of file
+        return f"{self.tag.title} x{self.snippet_count} ({self.user.username})"
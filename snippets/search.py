@@ -0,0 +1,86 @@
+"""
+Full-text search over a user's snippets.
+
+On MySQL the query runs against the ``FULLTEXT (title, note)`` index added in
+migration 0003 and is ranked by ``MATCH ... AGAINST`` relevance.  Other
+backends (the SQLite test database) fall back to a small in-memory inverted
+index built over the user's snippets.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Snippet
+
+TOKEN_RE = re.compile(r"\w+")
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(text.lower())
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(tokenize(query))
+
+
+class InvertedIndex:
+    """term -> {snippet_id: weighted term frequency}, ranked with a plain tf-idf."""
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        self.titles = {}
+        for snippet_id, title, note in rows:
+            self.titles[snippet_id] = title
+            frequencies = Counter(tokenize(note))
+            for term in tokenize(title):
+                frequencies[term] += TITLE_WEIGHT
+            for term, frequency in frequencies.items():
+                self.postings[term][snippet_id] = frequency
+
+    def search(self, query: str) -> list:
+        """``[(snippet_id, score), ...]`` best match first, ties broken newest id first."""
+        scores = defaultdict(float)
+        documents = len(self.titles)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term, {})
+            if not postings:
+                continue
+            idf = math.log(1 + documents / len(postings))
+            for snippet_id, frequency in postings.items():
+                scores[snippet_id] += frequency * idf
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+def _search_mysql(user, query, offset, limit):
+    relevance = RawSQL(
+        "MATCH (title, note) AGAINST (%s IN NATURAL LANGUAGE MODE)", (query,), output_field=FloatField()
+    )
+    matches = Snippet.objects.filter(created_by=user).annotate(score=relevance).filter(score__gt=0)
+    total = matches.count()
+    rows = list(matches.order_by("-score", "-id").only("id", "title", "created_on", "updated_on")[offset:offset + limit])
+    return total, rows
+
+
+def _search_fallback(user, query, offset, limit):
+    rows = Snippet.objects.filter(created_by=user).values_list("id", "title", "note").iterator()
+    index = InvertedIndex(rows)
+    ranked = index.search(query)
+    hits = []
+    for snippet_id, score in ranked[offset:offset + limit]:
+        snippet = Snippet(id=snippet_id, title=index.titles[snippet_id])
+        snippet.score = score
+        hits.append(snippet)
+    return len(ranked), hits
+
+
+def search_snippets(user, query: str, page: int, page_size: int):
+    """Return ``(total_results, snippets)`` for one page, each snippet carrying a ``score``."""
+    offset = (page - 1) * page_size
+    if connection.vendor == "mysql":
+        return _search_mysql(user, query, offset, page_size)
+    return _search_fallback(user, query, offset, page_size)
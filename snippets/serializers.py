@@ -1,6 +1,9 @@
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
-from .models import Snippet, Tag
+from accounts.models import Profile
+from .models import Snippet, SnippetTag, Tag, TagDiff, TagUsage
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -57,33 +60,54 @@ class SnippetWriteSerializer(serializers.ModelSerializer):
 
     def _resolve_tags(self, tag_titles):
         """
-        For each title: fetch the existing tag or create a new one.
-        This is intentionally a single loop with get_or_create so we never
-        end up with duplicate tags 
+        Normalise the titles and resolve them in one batched pass so the query
+        count does not grow with the number of tags.  Returns ``(tags, created)``.
         """
-        tags = []
-        for raw_title in tag_titles:
-            title = raw_title.strip().lower()
-            if not title:
-                continue
-            tag, _ = Tag.objects.get_or_create(title=title)
-            tags.append(tag)
-        return tags
+        return Tag.objects.resolve_titles(tag_titles)
+
+    def _sync_tag_usage(self, snippet, before, after):
+        deltas = {tag_id: 1 for tag_id in after - before}
+        deltas.update({tag_id: -1 for tag_id in before - after})
+        TagUsage.objects.adjust(snippet.created_by, deltas)
 
     def create(self, validated_data):
+        """Saves the snippet; ``tag_diff`` then tells which tag caches it made stale."""
         tag_titles = validated_data.pop("tag_titles", [])
-        snippet = Snippet.objects.create(**validated_data)
-        if tag_titles:
-            snippet.tags.set(self._resolve_tags(tag_titles))
+        self.tag_diff = TagDiff()
+        with transaction.atomic():
+            snippet = Snippet.objects.create(**validated_data)
+            Profile.objects.adjust_snippet_count(snippet.created_by, 1)
+            if tag_titles:
+                tags, created = self._resolve_tags(tag_titles)
+                snippet.tags.set(tags, through_defaults=SnippetTag.defaults_for(snippet))
+                after = frozenset(tag.id for tag in tags)
+                self._sync_tag_usage(snippet, set(), after)
+                self.tag_diff = TagDiff(after=after, created=bool(created))
         return snippet
 
     def update(self, instance, validated_data):
+        """Saves the changes; ``tag_diff`` then tells which tag caches they made stale."""
         tag_titles = validated_data.pop("tag_titles", None)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        if tag_titles is not None:
-            instance.tags.set(self._resolve_tags(tag_titles))
+        self.tag_diff = TagDiff()
+        with transaction.atomic():
+            # Lock the row and read the title and links it has now, not what
+            # ``instance`` was loaded with: a concurrent update of the same
+            # snippet waits here, so the counter deltas start from its result.
+            current_title = Snippet.objects.select_for_update().values_list("title", flat=True).get(pk=instance.pk)
+            before = frozenset(SnippetTag.objects.filter(snippet=instance).values_list("tag_id", flat=True))
+            getattr(instance, "_prefetched_objects_cache", {}).pop("tags", None)  # may predate the lock
+            title_changed = "title" in validated_data and validated_data["title"] != current_title
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            if tag_titles is not None:
+                tags, created = self._resolve_tags(tag_titles)
+                instance.tags.set(tags, through_defaults=SnippetTag.defaults_for(instance))
+                after = frozenset(tag.id for tag in tags)
+                self._sync_tag_usage(instance, before, after)
+                self.tag_diff = TagDiff(before, after, created=bool(created), title_changed=title_changed)
+            elif title_changed:
+                self.tag_diff = TagDiff(before, before, title_changed=True)
         return instance
 
     def to_representation(self, instance):
@@ -91,28 +115,74 @@ class SnippetWriteSerializer(serializers.ModelSerializer):
         return SnippetDetailSerializer(instance, context=self.context).data
     
 
+URL_PLACEHOLDER = 918273645546372819
+
+
+def resolve_url_template(view_name, lookup_url_kwarg, request, format=None):
+    """
+    ``(prefix, suffix)`` of the absolute URL of ``view_name`` around its integer
+    lookup, resolved once for a placeholder id so callers can format ids into it.
+    """
+    url = reverse(view_name, kwargs={lookup_url_kwarg: URL_PLACEHOLDER}, request=request, format=format)
+    prefix, _, suffix = url.rpartition(str(URL_PLACEHOLDER))
+    return prefix, suffix
+
+
+class PrecomputedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    """
+    ``HyperlinkedIdentityField`` that resolves the URL once per request, for a
+    placeholder id, and then formats each object's id into it instead of
+    calling ``reverse()`` and ``build_absolute_uri()`` for every row.  Only for
+    integer lookups, which URLs carry verbatim, so the output is identical.
+    """
+
+    def _url_template(self, view_name, request, format):
+        key = (view_name, format)
+        if getattr(self, "_template_request", None) is not request or self._template_key != key:
+            template = resolve_url_template(view_name, self.lookup_url_kwarg, request, format)
+            self._template_request, self._template_key, self._template = request, key, template
+        return self._template
+
+    def get_url(self, obj, view_name, request, format):
+        if hasattr(obj, "pk") and obj.pk in (None, ""):
+            return None
+        prefix, suffix = self._url_template(view_name, request, format)
+        return f"{prefix}{int(getattr(obj, self.lookup_field))}{suffix}"
+
+    def to_representation(self, value):
+        # A plain str rather than DRF's Hyperlink, which keeps the model instance
+        # and pickles via str(instance), loading created_by for every cached row.
+        format = self.context.get("format")
+        if format and self.format and self.format != format:
+            format = self.format
+        return self.get_url(value, self.view_name, self.context["request"], format)
+
+
 class SnippetOverviewSerializer(serializers.ModelSerializer):
     """
-    Thin representation for the overview list – title and a hyperlink
-    to the detail endpoint.
+    Thin representation for the overview list – title, timestamps and a
+    hyperlink to the detail endpoint.  The timestamps let cached pages be
+    patched in order and only with newer versions, see ``write_through_snippet``.
     """
 
-    detail_url = serializers.HyperlinkedIdentityField(
+    detail_url = PrecomputedHyperlinkedIdentityField(
         view_name="snippet-detail-api", # this is the api name for url resolution
         lookup_field="id",
     )
 
     class Meta:
         model = Snippet
-        fields = ["id", "title", "detail_url"]
+        fields = ["id", "title", "created_on", "updated_on", "detail_url"]
 
 
-class TagDetailSerializer(serializers.ModelSerializer):
-    """Tag with all its associated snippets (overview level)."""
+class TagUsageSerializer(serializers.ModelSerializer):
+    """A tag with the number of the requesting user's snippets under it."""
 
-    snippets = SnippetOverviewSerializer(many=True, read_only=True)
+    id = serializers.IntegerField(source="tag_id")
+    title = serializers.CharField(source="tag.title")
 
     class Meta:
-        model = Tag
-        fields = ["id", "title", "snippets"]
+        model = TagUsage
+        fields = ["id", "title", "snippet_count"]
+
 
@@ -0,0 +1,131 @@
+"""
+Tag autocomplete (``tags/suggest/?q=``).
+
+Suggestions come from in-process prefix indexes: sorted arrays of tag titles,
+built lazily on the first suggestion and answering a prefix with a binary
+search, no database or Redis round trip.  Users are suggested their own tags,
+from an index per user built from their ``TagUsage`` rows and tagged with the
+user's tag generation (see ``user_tag_list_key``), which their snippet writes
+bump.  Admins, who may see every tag (``tags/all/``), are also suggested from
+an index of all the tag titles, tagged with the ``tags:suggest`` generation,
+which is bumped whenever a write creates tags.  A worker that sees a newer
+generation rebuilds the index on the next suggestion.
+"""
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .models import Tag, TagUsage
+from utils.cache_utils import TAG_SCOPE, TAG_SUGGEST_SCOPE, get_generation, user_tag_scope
+from utils.tiered_cache import LocalLRUCache
+
+
+class TagPrefixIndex:
+    """
+    Tag titles sorted by code point, so the titles sharing a prefix are one
+    contiguous run.  Rows are ``(id, title)`` or, for a user's index,
+    ``(id, title, snippet_count)``.
+    """
+
+    def __init__(self, rows, generation=None):
+        rows = sorted(rows, key=lambda row: row[1])
+        self.ids = [row[0] for row in rows]
+        self.titles = [row[1] for row in rows]
+        self.counts = [row[2] if len(row) > 2 else 0 for row in rows]
+        self.generation = generation
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _run(self, prefix: str) -> range:
+        """Positions of the titles starting with ``prefix``."""
+        start = end = bisect_left(self.titles, prefix)
+        while end < len(self.titles) and self.titles[end].startswith(prefix):
+            end += 1
+        return range(start, end)
+
+    def prefix(self, prefix: str, limit: int) -> list:
+        """Up to ``limit`` ``(id, title)`` pairs whose title starts with ``prefix``, in title order."""
+        matches = []
+        start = bisect_left(self.titles, prefix)
+        for position in range(start, min(start + limit, len(self.titles))):
+            if not self.titles[position].startswith(prefix):
+                break
+            matches.append((self.ids[position], self.titles[position]))
+        return matches
+
+    def popular(self, prefix: str, limit: int) -> list:
+        """Like ``prefix``, most used first and by title among equals."""
+        positions = sorted(self._run(prefix), key=lambda position: -self.counts[position])  # stable
+        return [(self.ids[position], self.titles[position]) for position in positions[:limit]]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def tag_index() -> TagPrefixIndex:
+    """This worker's index, rebuilt when the ``tags:suggest`` generation has moved on."""
+    global _index
+    generation = get_generation(TAG_SUGGEST_SCOPE)
+    index = _index
+    if index is None or index.generation != generation:
+        with _index_lock:
+            index = _index
+            if index is None or index.generation != generation:
+                # Generation read first: a tag created meanwhile at worst labels
+                # a newer snapshot with an older generation, rebuilt once more.
+                index = TagPrefixIndex(Tag.objects.order_by().values_list("id", "title"), generation)
+                _index = index
+    return index
+
+
+_user_indexes = None
+
+
+def user_tag_index(user_id: int) -> TagPrefixIndex:
+    """
+    This worker's index of the user's tags and their snippet counts, rebuilt
+    when the ``tags`` generation or the user's own has moved on.  The indexes of
+    the ``TAG_SUGGEST_USER_INDEXES`` most recently active users are kept.
+    """
+    global _user_indexes
+    if _user_indexes is None:
+        _user_indexes = LocalLRUCache(settings.TAG_SUGGEST_USER_INDEXES["MAX_USERS"])
+    generation = (get_generation(TAG_SCOPE), get_generation(user_tag_scope(user_id)))
+    index = _user_indexes.get(user_id)
+    if not isinstance(index, TagPrefixIndex) or index.generation != generation:
+        # No lock: only the user's own concurrent requests can race here, and
+        # rebuilding twice is harmless.
+        usages = TagUsage.objects.filter(user_id=user_id, snippet_count__gt=0).order_by()
+        index = TagPrefixIndex(usages.values_list("tag_id", "tag__title", "snippet_count"), generation)
+        _user_indexes.set(user_id, index, settings.TAG_SUGGEST_USER_INDEXES["TTL"])
+    return index
+
+
+def normalize_prefix(query: str) -> str:
+    """Tag titles are stored stripped and lowercased, see ``normalize_tag_titles``."""
+    return query.strip().lower()
+
+
+def suggest_tags(prefix: str, limit: int, user, sort: str = "title", all_tags: bool = False) -> list:
+    """
+    Up to ``limit`` ``{"id", "title"}`` tags of ``user`` starting with ``prefix``,
+    from the user's index, in title order or, for ``sort="popular"``, most used
+    first.  With ``all_tags`` (admins) every tag is suggested from the index of
+    all tags, the user's own ranked first for ``popular``.
+    """
+    if not prefix:
+        return []
+    ranked = []
+    if sort == "popular" or not all_tags:
+        index = user_tag_index(user.pk)
+        ranked = index.popular(prefix, limit) if sort == "popular" else index.prefix(prefix, limit)
+    matches = ranked
+    if all_tags:
+        seen = {tag_id for tag_id, _ in ranked}
+        matches = ranked + [
+            match for match in tag_index().prefix(prefix, limit + len(seen)) if match[0] not in seen
+        ]
+    return [{"id": tag_id, "title": title} for tag_id, title in matches[:limit]]
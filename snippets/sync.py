@@ -0,0 +1,88 @@
+"""
+Delta sync: a user's snippets created or updated since a sync token, plus the
+ids of those deleted, read from ``SnippetTombstone``.
+
+A token is a position on the ``updated_on`` clock.  Each call returns the rows in
+``(since, upper]``, oldest first, and ``upper`` as the next token.  A batch never
+splits rows that share one timestamp, so a token never falls in the middle of
+them.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Snippet, SnippetTombstone
+
+
+class InvalidSyncToken(ValueError):
+    """Raised when a client sends a sync token we did not issue."""
+
+
+@dataclass
+class SyncBatch:
+    snippets: list
+    deleted_ids: list = field(default_factory=list)
+    upper: object = None
+    has_more: bool = False
+
+
+def encode_sync_token(position) -> str:
+    raw = json.dumps({"t": position.isoformat()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = parse_datetime(json.loads(base64.urlsafe_b64decode(padded.encode()).decode())["t"])
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError) as e:
+        raise InvalidSyncToken("Invalid sync token.") from e
+    if position is None or timezone.is_naive(position):
+        raise InvalidSyncToken("Invalid sync token.")
+    return position
+
+
+def tombstone_cutoff():
+    """Tombstones older than this are purged, so tokens older than it cannot be served."""
+    return timezone.now() - timedelta(days=settings.SNIPPET_SYNC["TOMBSTONE_RETENTION_DAYS"])
+
+
+def changes_since(user, since, limit: int) -> SyncBatch:
+    """
+    Up to ``limit`` of ``user``'s snippets changed after ``since`` (all of them
+    when ``since`` is ``None``) and the ids deleted in the same window.  More
+    rows are returned only when over ``limit`` of them share one timestamp.
+    """
+    horizon = timezone.now() - timedelta(seconds=settings.SNIPPET_SYNC["SETTLE_SECONDS"])
+    snippets = (
+        Snippet.objects.filter(created_by=user, updated_on__lte=horizon)
+        .select_related("created_by")
+        .prefetch_related("tags")
+        .order_by("updated_on", "id")
+    )
+    if since is not None:
+        snippets = snippets.filter(updated_on__gt=since)
+
+    changed = list(snippets[: limit + 1])
+    upper, has_more = horizon, len(changed) > limit
+    if has_more:
+        upper = changed[limit].updated_on
+        changed = [snippet for snippet in changed if snippet.updated_on < upper]
+        if changed:
+            upper = changed[-1].updated_on
+        else:  # every fetched row shares one timestamp, send all rows at it together
+            changed = list(snippets.filter(updated_on=upper))
+
+    deleted_ids = []
+    if since is not None:  # a first sync has nothing to delete
+        deleted_ids = list(
+            SnippetTombstone.objects.filter(user=user, deleted_on__gt=since, deleted_on__lte=upper)
+            .order_by("deleted_on", "id")
+            .values_list("snippet_id", flat=True)
+        )
+    return SyncBatch(snippets=changed, deleted_ids=deleted_ids, upper=upper, has_more=has_more)
@@ -1,17 +1,66 @@
+import io
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework import status
-from rest_framework.test import APITestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 
-from .models import Tag, Snippet
+from accounts.models import Profile
+from .models import Tag, Snippet, SnippetTag, SnippetTombstone, TagUsage
+from .serializers import SnippetOverviewSerializer, SnippetWriteSerializer
+from . import suggest
+from .sync import encode_sync_token
+from utils.custom_response import render_json
+from utils.renderers import FastJSONRenderer
+from utils.response_cache import cached_or_build, make_entry, should_refresh_early
+from utils.tiered_cache import LocalLRUCache, tiered_cache
+from utils.cache_utils import (
+    bump_generation,
+    generation_key,
+    get_generation,
+    invalidate_all_tag_caches,
+    invalidate_snippet_caches,
+    snippet_count_key,
+    snippet_detail_key,
+    snippet_list_key,
+    store_snippet_count,
+    tag_detail_key,
+    tag_detail_scope,
+    tag_list_key,
+    user_tag_list_key,
+    write_through_snippet,
+)
 
 User = get_user_model()
 
 
+TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=TEST_CACHES)
 class BaseSnippetTest(APITestCase):
     """Shared setup: two users, one authenticated."""
 
     def setUp(self):
+        cache.clear()  # ids are reused between tests, so cached payloads must not leak
+        tiered_cache.clear_local()
         self.user = User.objects.create_user(username="alice", password="pass1234")
         self.other_user = User.objects.create_user(username="bob", password="pass1234")
         self._authenticate(self.user)
@@ -19,7 +68,8 @@ class BaseSnippetTest(APITestCase):
     def _authenticate(self, user):
         login_url = reverse("user login api")
         resp = self.client.post(login_url, {"username": user.username, "password": "pass1234"})
-        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['data']['access']}")
+        self.access_token = resp.data['data']['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
 
     def _create_snippet(self, title="Test Snippet", note="Hello world", tag_titles=None):
         url = reverse("create-snippet-api")
@@ -55,6 +105,91 @@ class SnippetOverviewTest(BaseSnippetTest):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class SnippetOverviewPaginationTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        self.titles = [f"note {i}" for i in range(5)]
+        for title in self.titles:
+            self._create_snippet(title=title)
+        self.url = reverse("snippet-overview-api")
+
+    def test_cursor_walks_all_snippets_newest_first(self):
+        seen = []
+        response = self.client.get(self.url, {"page_size": 2})
+        while True:
+            data = response.data["data"]
+            self.assertEqual(data["total_snippets"], 5)
+            seen.extend(s["title"] for s in data["snippets"])
+            if not data["next_cursor"]:
+                break
+            response = self.client.get(self.url, {"page_size": 2, "cursor": data["next_cursor"]})
+        self.assertEqual(seen, list(reversed(self.titles)))
+
+    def test_prev_cursor_returns_previous_page(self):
+        first = self.client.get(self.url, {"page_size": 2}).data["data"]
+        second = self.client.get(self.url, {"page_size": 2, "cursor": first["next_cursor"]}).data["data"]
+        back = self.client.get(self.url, {"page_size": 2, "cursor": second["prev_cursor"]}).data["data"]
+        self.assertEqual(back["snippets"], first["snippets"])
+        self.assertIsNone(first["prev_cursor"])
+
+    def test_invalid_cursor_returns_400(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_write_refreshes_cached_pages(self):
+        self.client.get(self.url, {"page_size": 2})
+        self._create_snippet(title="newest")
+        data = self.client.get(self.url, {"page_size": 2}).data["data"]
+        self.assertEqual(data["snippets"][0]["title"], "newest")
+        self.assertEqual(data["total_snippets"], 6)
+
+
+class SnippetOverviewTagFilterTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        self.ids = {}
+        for title, tags in [("both", ["python", "perf"]), ("py", ["python"]), ("perf", ["perf"]), ("none", [])]:
+            self.ids[title] = self._create_snippet(title=title, tag_titles=tags).data["data"]["id"]
+        self._authenticate(self.other_user)
+        self._create_snippet(title="bob", tag_titles=["python", "perf"])
+        self._authenticate(self.user)
+        self.url = reverse("snippet-overview-api")
+
+    def _titles(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [snippet["title"] for snippet in response.data["data"]["snippets"]]
+
+    def test_all_and_any_modes(self):
+        self.assertEqual(self._titles(tags="python,perf"), ["both"])
+        self.assertEqual(self._titles(tags="python,perf", mode="any"), ["perf", "py", "both"])
+        self.assertEqual(self._titles(tags="python,missing"), [])
+        self.assertEqual(self._titles(tags="python"), ["py", "both"])
+
+    def test_equivalent_filters_share_a_cache_entry(self):
+        data = self.client.get(self.url, {"tags": " Perf ,python"}).data
+        self.assertEqual((data["data"]["tags"], data["data"]["mode"]), (["perf", "python"], "all"))
+        response = self.client.get(self.url, {"tags": "python,perf,python"})
+        self.assertEqual(response.data["message"], "Snippets retrieved from cache.")
+
+    def test_filter_is_paginated_and_one_query(self):
+        with self.assertNumQueries(2):  # user, filtered page
+            first = self.client.get(self.url, {"tags": "python,perf", "mode": "any", "page_size": 2}).data["data"]
+        self.assertEqual([s["title"] for s in first["snippets"]], ["perf", "py"])
+        rest = self._titles(tags="python,perf", mode="any", page_size=2, cursor=first["next_cursor"])
+        self.assertEqual(rest, ["both"])
+
+    def test_write_refreshes_filtered_pages(self):
+        self.assertEqual(self._titles(tags="python,perf"), ["both"])
+        url = reverse("snippet-detail-api", kwargs={"id": self.ids["py"]})
+        self.client.put(url, {"title": "py", "note": "Hello world", "tag_titles": ["perf", "python"]}, format="json")
+        self.assertEqual(self._titles(tags="python,perf"), ["py", "both"])
+
+    def test_unknown_mode_returns_400(self):
+        response = self.client.get(self.url, {"tags": "python", "mode": "xor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class SnippetCreateTest(BaseSnippetTest):
     def test_create_snippet_without_tags(self):
         response = self._create_snippet()
@@ -85,6 +220,122 @@ class SnippetCreateTest(BaseSnippetTest):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+class TagResolutionTest(BaseSnippetTest):
+    def test_titles_are_normalised_and_deduplicated(self):
+        tags, created = Tag.objects.resolve_titles([" Python ", "python", "", "Django"])
+        self.assertEqual([t.title for t in tags], ["python", "django"])
+        self.assertEqual(created, tags)
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_existing_tags_are_reused(self):
+        existing = Tag.objects.create(title="python")
+        tags, created = Tag.objects.resolve_titles(["python", "perf"])
+        self.assertEqual(tags[0].pk, existing.pk)
+        self.assertEqual([t.title for t in created], ["perf"])
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_query_count_is_constant_in_number_of_tags(self):
+        def count_queries(tag_titles):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self._create_snippet(tag_titles=tag_titles)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        few = count_queries([f"few-{i}" for i in range(2)])
+        many = count_queries([f"many-{i}" for i in range(20)])
+        self.assertEqual(few, many)
+
+
+@override_settings(SNIPPET_IMPORT_CHUNK_SIZE=2, SNIPPET_EXPORT_BATCH_SIZE=2)
+class SnippetImportExportTest(BaseSnippetTest):
+    def _import(self, lines):
+        body = "\n".join(lines).encode()
+        return self.client.post(reverse("snippet-import-api"), data=body, content_type="application/x-ndjson")
+
+    def test_import_creates_snippets_and_reports_bad_lines(self):
+        response = self._import([
+            json.dumps({"title": "one", "note": "a", "tag_titles": ["Python", "perf"]}),
+            json.dumps({"title": "two", "note": "b", "tag_titles": ["python"]}),
+            "{not json",
+            json.dumps({"title": "no note"}),
+            json.dumps({"title": "three", "note": "c"}),
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["data"]["imported"], 3)
+        self.assertEqual(response.data["data"]["failed"], 2)
+        self.assertEqual([e["line"] for e in response.data["data"]["errors"]], [3, 4])
+        self.assertEqual(Snippet.objects.filter(created_by=self.user).count(), 3)
+        self.assertEqual(Tag.objects.get(title="python").snippets.count(), 2)
+        self.assertEqual(TagUsage.objects.get(user=self.user, tag__title="python").snippet_count, 2)
+
+    def test_import_without_returning_bulk_insert(self):
+        # MySQL path: ids are recovered after the insert instead of returned by it
+        features = type(connection.features)
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock, return_value=False):
+            response = self._import([json.dumps({"title": f"n{i}", "note": "x", "tag_titles": [f"t{i}"]}) for i in range(3)])
+        self.assertEqual(response.data["data"]["imported"], 3)
+        for i in range(3):
+            self.assertEqual(Snippet.objects.get(title=f"n{i}").tags.get().title, f"t{i}")
+
+    def test_import_invalidates_overview(self):
+        self.client.get(reverse("snippet-overview-api"))
+        self._import([json.dumps({"title": "imported", "note": "x"})])
+        response = self.client.get(reverse("snippet-overview-api"))
+        self.assertEqual(response.data["data"]["total_snippets"], 1)
+
+    def test_export_round_trips_through_import(self):
+        for i in range(3):
+            self._create_snippet(title=f"note {i}", tag_titles=["export"])
+        response = self.client.get(reverse("snippet-export-api"))
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([r["title"] for r in rows], ["note 0", "note 1", "note 2"])
+        self.assertEqual(rows[0]["tag_titles"], ["export"])
+
+        self._authenticate(self.other_user)
+        self.assertEqual(self._import(lines).data["data"]["imported"], 3)
+        self.assertEqual(Snippet.objects.filter(created_by=self.other_user).count(), 3)
+
+
+class SnippetSearchTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        self._create_snippet(title="Redis tuning", note="Notes about eviction policies.")
+        self._create_snippet(title="MySQL indexes", note="Covering indexes and redis caching in front.")
+        self._create_snippet(title="Groceries", note="Milk and eggs.")
+        self.url = reverse("snippet-search-api")
+
+    def test_results_ranked_by_relevance(self):
+        response = self.client.get(self.url, {"q": "redis"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data["data"]
+        self.assertEqual(data["total_results"], 2)
+        self.assertEqual([r["title"] for r in data["results"]], ["Redis tuning", "MySQL indexes"])
+        self.assertIn("detail_url", data["results"][0])
+
+    def test_search_is_scoped_to_user(self):
+        self._authenticate(self.other_user)
+        response = self.client.get(self.url, {"q": "redis"})
+        self.assertEqual(response.data["data"]["total_results"], 0)
+
+    def test_pagination(self):
+        response = self.client.get(self.url, {"q": "redis", "page_size": 1, "page": 2})
+        data = response.data["data"]
+        self.assertEqual([r["title"] for r in data["results"]], ["MySQL indexes"])
+        self.assertIsNone(data["next_page"])
+
+    def test_write_invalidates_cached_results(self):
+        self.client.get(self.url, {"q": "eggs"})
+        self._create_snippet(title="Breakfast", note="Eggs again.")
+        response = self.client.get(self.url, {"q": "eggs"})
+        self.assertEqual(response.data["data"]["total_results"], 2)
+
+    def test_missing_query_returns_400(self):
+        response = self.client.get(self.url, {"q": "  "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class SnippetDetailTest(BaseSnippetTest):
     def setUp(self):
         super().setUp()
@@ -146,6 +397,27 @@ class SnippetDeleteTest(BaseSnippetTest):
         self.assertEqual(response.data["data"]["total_snippets_remaining"], 1)
         self.assertFalse(Snippet.objects.filter(pk=self.snippet_id).exists())
 
+    def test_delete_is_lean_by_default(self):
+        url = reverse("snippet-detail-api", kwargs={"id": self.snippet_id})
+        response = self.client.delete(url)
+        self.assertEqual(response.data["data"], {"deleted_id": self.snippet_id, "total_snippets_remaining": 0})
+
+    def test_delete_lists_remaining_page_on_request(self):
+        for title in ("one", "two", "three"):
+            self._create_snippet(title=title)
+        url = reverse("snippet-detail-api", kwargs={"id": self.snippet_id})
+        response = self.client.delete(url + "?include=snippets&page_size=2")
+        data = response.data["data"]
+        self.assertEqual(data["total_snippets_remaining"], 3)
+        self.assertEqual([s["title"] for s in data["snippets"]], ["three", "two"])
+        self.assertIsNotNone(data["next_cursor"])
+
+    def test_invalid_cursor_does_not_delete(self):
+        url = reverse("snippet-detail-api", kwargs={"id": self.snippet_id})
+        response = self.client.delete(url + "?include=snippets&cursor=bogus")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Snippet.objects.filter(pk=self.snippet_id).exists())
+
     def test_delete_by_other_user_returns_404(self):
         self._authenticate(self.other_user)
         url = reverse("snippet-detail-api", kwargs={"id": self.snippet_id})
@@ -153,17 +425,321 @@ class SnippetDeleteTest(BaseSnippetTest):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+@override_settings(SNIPPET_SYNC={"SETTLE_SECONDS": 0, "TOMBSTONE_RETENTION_DAYS": 30})
+class SnippetChangesTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("snippet-changes-api")
+        self.ids = [self._create_snippet(title=f"note {i}").data["data"]["id"] for i in range(3)]
+
+    def test_first_sync_then_delta(self):
+        data = self.client.get(self.url).data["data"]
+        self.assertEqual([s["id"] for s in data["snippets"]], self.ids)
+        self.assertEqual(data["deleted_ids"], [])
+        self.assertFalse(data["has_more"])
+
+        self.client.put(reverse("snippet-detail-api", kwargs={"id": self.ids[0]}), {"title": "edited", "note": "x"}, format="json")
+        self.client.delete(reverse("snippet-detail-api", kwargs={"id": self.ids[1]}))
+        created = self._create_snippet(title="new").data["data"]["id"]
+
+        delta = self.client.get(self.url, {"since": data["next_since"]}).data["data"]
+        self.assertEqual([s["id"] for s in delta["snippets"]], [self.ids[0], created])
+        self.assertEqual(delta["snippets"][0]["title"], "edited")
+        self.assertEqual(delta["deleted_ids"], [self.ids[1]])
+
+        unchanged = self.client.get(self.url, {"since": delta["next_since"]}).data["data"]
+        self.assertEqual((unchanged["snippets"], unchanged["deleted_ids"]), ([], []))
+
+    def test_pages_with_has_more(self):
+        seen, since = [], None
+        while True:
+            params = {"page_size": 2, **({"since": since} if since else {})}
+            data = self.client.get(self.url, params).data["data"]
+            seen.extend(s["id"] for s in data["snippets"])
+            since = data["next_since"]
+            if not data["has_more"]:
+                break
+        self.assertEqual(seen, self.ids)
+
+    def test_rows_sharing_a_timestamp_stay_together(self):
+        Snippet.objects.filter(pk__in=self.ids).update(updated_on=Snippet.objects.get(pk=self.ids[0]).updated_on)
+        data = self.client.get(self.url, {"page_size": 2}).data["data"]
+        self.assertEqual(sorted(s["id"] for s in data["snippets"]), self.ids)
+
+    def test_settle_window_holds_back_fresh_rows(self):
+        with self.settings(SNIPPET_SYNC={"SETTLE_SECONDS": 60, "TOMBSTONE_RETENTION_DAYS": 30}):
+            self.assertEqual(self.client.get(self.url).data["data"]["snippets"], [])
+
+    def test_invalid_and_expired_tokens(self):
+        self.assertEqual(self.client.get(self.url, {"since": "bogus"}).status_code, status.HTTP_400_BAD_REQUEST)
+        expired = encode_sync_token(timezone.now() - timedelta(days=31))
+        self.assertEqual(self.client.get(self.url, {"since": expired}).status_code, status.HTTP_410_GONE)
+
+    def test_purge_removes_old_tombstones(self):
+        self.client.delete(reverse("snippet-detail-api", kwargs={"id": self.ids[0]}))
+        self.client.delete(reverse("snippet-detail-api", kwargs={"id": self.ids[1]}))
+        SnippetTombstone.objects.filter(snippet_id=self.ids[0]).update(deleted_on=timezone.now() - timedelta(days=31))
+        call_command("purge_snippet_tombstones", stdout=io.StringIO())
+        self.assertEqual(list(SnippetTombstone.objects.values_list("snippet_id", flat=True)), [self.ids[1]])
+
+
+class ProfileCounterTest(BaseSnippetTest):
+    def test_counter_follows_create_import_and_delete(self):
+        snippet_id = self._create_snippet().data["data"]["id"]
+        body = "\n".join(json.dumps({"title": f"t{i}", "note": "n"}) for i in range(3))
+        self.client.post(reverse("snippet-import-api"), data=body, content_type="application/x-ndjson")
+        self.client.delete(reverse("snippet-detail-api", kwargs={"id": snippet_id}))
+        self.assertEqual(Profile.objects.snippet_count(self.user), 3)
+        self.assertEqual(Profile.objects.snippet_count(self.other_user), 0)
+
+
 class TagListTest(BaseSnippetTest):
-    def test_tag_list_returns_all_tags(self):
+    def test_tag_list_returns_own_tags_only(self):
         self._create_snippet(tag_titles=["python", "django"])
+        self._authenticate(self.other_user)
+        self._create_snippet(tag_titles=["rust"])
+        self._authenticate(self.user)
         url = reverse("tag-list-api")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        tag_titles = [t["title"] for t in response.data["data"]]
-        self.assertIn("python", tag_titles)
-        self.assertIn("django", tag_titles)
+        tag_titles = [t["title"] for t in response.data["data"]["tags"]]
+        self.assertEqual(tag_titles, ["django", "python"])
+        self.assertEqual(response.data["data"]["total_tags"], 2)
+
+    def test_tag_list_is_paginated(self):
+        self._create_snippet(tag_titles=["a", "b", "c"])
+        url = reverse("tag-list-api")
+        first = self.client.get(url, {"page_size": 2}).data["data"]
+        self.assertEqual(([t["title"] for t in first["tags"]], first["next_page"]), (["a", "b"], 2))
+        second = self.client.get(url, {"page_size": 2, "page": 2}).data["data"]
+        self.assertEqual(([t["title"] for t in second["tags"]], second["next_page"]), (["c"], None))
+        self.assertEqual(second["total_tags"], 3)
+
+    def test_global_list_is_admin_only(self):
+        self._create_snippet(tag_titles=["python"])
+        self._authenticate(self.other_user)
+        self._create_snippet(tag_titles=["rust"])
+        self.assertEqual(self.client.get(reverse("tag-all-list-api")).status_code, status.HTTP_403_FORBIDDEN)
+        admin = User.objects.create_superuser(username="root", password="pass1234")
+        self._authenticate(admin)
+        response = self.client.get(reverse("tag-all-list-api"))
+        self.assertEqual([t["title"] for t in response.data["data"]], ["python", "rust"])
         
 
+class TagSuggestTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        suggest._index = suggest._user_indexes = None  # tag ids are reused between tests
+        self._create_snippet(tag_titles=["python", "pytest", "django", "pyramid"])
+        self.url = reverse("tag-suggest-api")
+
+    def _titles(self, query):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [tag["title"] for tag in response.data["data"]]
+
+    def test_prefix_matches_in_title_order(self):
+        self.assertEqual(self._titles("?q=Py"), ["pyramid", "pytest", "python"])
+        self.assertEqual(self._titles("?q=py&limit=2"), ["pyramid", "pytest"])
+        self.assertEqual(self._titles("?q=rust"), [])
+        self.assertEqual(self._titles("?q="), [])
+
+    def test_other_users_tags_are_not_suggested(self):
+        self._authenticate(self.other_user)
+        self._create_snippet(tag_titles=["pyside"])
+        self.assertEqual(self._titles("?q=py"), ["pyside"])
+        self._authenticate(self.user)
+        self.assertEqual(self._titles("?q=py"), ["pyramid", "pytest", "python"])
+        self.assertEqual(self._titles("?q=py&sort=popular&limit=50"), ["pyramid", "pytest", "python"])
+
+    def test_popular_ranks_most_used_first(self):
+        self._create_snippet(tag_titles=["python"])
+        self._create_snippet(tag_titles=["pytest", "python"])
+        self.assertEqual(self._titles("?q=py&sort=popular"), ["python", "pytest", "pyramid"])
+
+    def test_user_index_is_built_once_and_picks_up_new_tags(self):
+        self.assertEqual(self._titles("?q=py"), ["pyramid", "pytest", "python"])
+        with self.assertNumQueries(1):  # the JWT user lookup only
+            self._titles("?q=pyt")
+        self._create_snippet(tag_titles=["pypy"])
+        self.assertEqual(self._titles("?q=pyp"), ["pypy"])
+
+    def test_admin_index_is_built_once_and_picks_up_new_tags(self):
+        self._authenticate(User.objects.create_superuser(username="root", password="pass1234"))
+        self.assertEqual(self._titles("?q=py"), ["pyramid", "pytest", "python"])
+        with self.assertNumQueries(1):  # the JWT user lookup only
+            self._titles("?q=py")
+        self._create_snippet(tag_titles=["pypy", "python"])
+        self.assertEqual(self._titles("?q=pyp"), ["pypy"])
+        self.assertEqual(self._titles("?q=py&sort=popular"), ["pypy", "python", "pyramid", "pytest"])
+
+
+class TagCacheInvalidationTest(BaseSnippetTest):
+    """Snippet writes only drop the tag caches their tag diff touches."""
+
+    def setUp(self):
+        super().setUp()
+        self.snippet_id = self._create_snippet(title="First", tag_titles=["python", "sql"]).data["data"]["id"]
+        self._create_snippet(title="Second", tag_titles=["perf"])
+        self.tags = dict(Tag.objects.values_list("title", "id"))
+        self._authenticate(self.other_user)
+        self._create_snippet(title="Bob's", tag_titles=["python"])
+        self.client.get(reverse("snippets-linked-tag", kwargs={"id": self.tags["python"]}))
+        self._authenticate(self.user)
+        for title in self.tags:
+            self.client.get(reverse("snippets-linked-tag", kwargs={"id": self.tags[title]}))
+        self.client.get(reverse("tag-list-api") + "?sort=popular")
+        cache.set(tag_list_key(), ["cached"])  # the admin-only global list
+
+    def _cached(self):
+        """Which of the tag caches are still there."""
+        cached = {title for title, tag_id in self.tags.items() if cache.get(tag_detail_key(tag_id, self.user.pk))}
+        if cache.get(tag_list_key()):
+            cached.add("list")
+        if cache.get(user_tag_list_key(self.user.pk, "popular", settings.SNIPPET_PAGE_SIZE, 1)):
+            cached.add("popular")
+        if cache.get(tag_detail_key(self.tags["python"], self.other_user.pk)):
+            cached.add("bob")
+        return cached
+
+    def _update(self, **payload):
+        url = reverse("snippet-detail-api", kwargs={"id": self.snippet_id})
+        return self.client.put(url, {"title": "First", "note": "Hello world", **payload}, format="json")
+
+    def test_note_only_update_keeps_everything(self):
+        self._update(note="changed", tag_titles=["sql", "python"])
+        self.assertEqual(self._cached(), {"python", "sql", "perf", "list", "popular", "bob"})
+
+    def test_title_change_drops_details_of_its_tags(self):
+        self._update(title="Renamed")
+        self.assertEqual(self._cached(), {"perf", "list", "popular", "bob"})
+
+    def test_tag_change_drops_changed_tags_only(self):
+        self._update(tag_titles=["python", "perf"])
+        self.assertEqual(self._cached(), {"python", "list", "bob"})
+
+    def test_new_tag_drops_tag_list(self):
+        self._update(tag_titles=["python", "sql", "rust"])
+        self.assertEqual(self._cached(), {"python", "sql", "perf", "bob"})
+        self.assertIn("rust", [tag["title"] for tag in self.client.get(reverse("tag-list-api")).data["data"]["tags"]])
+
+    def test_import_drops_its_tags_only(self):
+        body = json.dumps({"title": "Imported", "note": "n", "tag_titles": ["sql"]}).encode()
+        self.client.post(reverse("snippet-import-api"), data=body, content_type="application/x-ndjson")
+        self.assertEqual(self._cached(), {"python", "perf", "list", "bob"})
+
+    def test_delete_drops_its_tags_only(self):
+        self.client.delete(reverse("snippet-detail-api", kwargs={"id": self.snippet_id}))
+        self.assertEqual(self._cached(), {"perf", "list", "bob"})
+        response = self.client.get(reverse("snippets-linked-tag", kwargs={"id": self.tags["python"]}))
+        self.assertEqual(response.data["data"]["snippets"], [])
+
+
+class TagUsageCounterTest(BaseSnippetTest):
+    def _count(self, title, user=None):
+        usage = TagUsage.objects.filter(user=user or self.user, tag__title=title).first()
+        return usage.snippet_count if usage else 0
+
+    def test_counters_follow_create_update_and_delete(self):
+        first = self._create_snippet(tag_titles=["python", "perf"]).data["data"]["id"]
+        self._create_snippet(tag_titles=["python"])
+        self.assertEqual((self._count("python"), self._count("perf")), (2, 1))
+
+        url = reverse("snippet-detail-api", kwargs={"id": first})
+        self.client.put(url, {"title": "t", "note": "n", "tag_titles": ["perf", "redis"]}, format="json")
+        self.assertEqual((self._count("python"), self._count("perf"), self._count("redis")), (1, 1, 1))
+
+        self.client.delete(url)
+        self.assertEqual((self._count("python"), self._count("perf"), self._count("redis")), (1, 0, 0))
+
+    def test_update_starts_from_current_links_not_a_stale_instance(self):
+        snippet_id = self._create_snippet(tag_titles=["x"]).data["data"]["id"]
+        # Loaded before a concurrent update commits, as a racing request would have.
+        stale = Snippet.objects.prefetch_related("tags").get(id=snippet_id)
+        list(stale.tags.all())
+        url = reverse("snippet-detail-api", kwargs={"id": snippet_id})
+        self.client.put(url, {"title": "t", "note": "n", "tag_titles": ["z"]}, format="json")
+
+        serializer = SnippetWriteSerializer(stale, data={"title": "t", "note": "n", "tag_titles": ["y"]})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.assertEqual((self._count("x"), self._count("y"), self._count("z")), (0, 1, 0))
+        self.assertEqual([tag["title"] for tag in serializer.data["tags"]], ["y"])
+
+    def test_popular_tag_list_is_per_user_and_sorted(self):
+        self._create_snippet(tag_titles=["python", "perf"])
+        self._create_snippet(tag_titles=["python"])
+        self._authenticate(self.other_user)
+        self._create_snippet(tag_titles=["perf"])
+        self._authenticate(self.user)
+
+        response = self.client.get(reverse("tag-list-api"), {"sort": "popular"})
+        self.assertEqual(
+            [(t["title"], t["snippet_count"]) for t in response.data["data"]["tags"]],
+            [("python", 2), ("perf", 1)],
+        )
+
+    def test_rebuild_command_restores_counters(self):
+        self._create_snippet(tag_titles=["python", "perf"])
+        self._create_snippet(tag_titles=["python"])
+        TagUsage.objects.update(snippet_count=42)
+        call_command("rebuild_tag_counters", stdout=io.StringIO())
+        self.assertEqual((self._count("python"), self._count("perf")), (2, 1))
+
+
+class AsyncReadViewTest(BaseSnippetTest):
+    """The async read paths must return exactly what the sync views return."""
+
+    def setUp(self):
+        super().setUp()
+        self.snippet_id = self._create_snippet(title="First", tag_titles=["backend"]).data["data"]["id"]
+        self._create_snippet(title="Second", tag_titles=["backend", "python"])
+        self.tag_id = Tag.objects.get(title="backend").pk
+
+    async def _async_get(self, url, **params):
+        return await self.async_client.get(url, params, headers={"authorization": f"Bearer {self.access_token}"})
+
+    async def test_payloads_match_sync_views(self):
+        pairs = [
+            ("snippet-overview-api", "async-snippet-overview-api", {}),
+            ("snippet-detail-api", "async-snippet-detail-api", {"id": self.snippet_id}),
+            ("tag-list-api", "async-tag-list-api", {}),
+            ("snippets-linked-tag", "async-snippets-linked-tag", {"id": self.tag_id}),
+        ]
+        for sync_name, async_name, kwargs in pairs:
+            await cache.aclear()
+            tiered_cache.clear_local()
+            async_response = await self._async_get(reverse(async_name, kwargs=kwargs))
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            await cache.aclear()
+            tiered_cache.clear_local()
+            sync_response = await sync_to_async(self.client.get)(reverse(sync_name, kwargs=kwargs))
+            self.assertEqual(json.loads(async_response.content), sync_response.json(), async_name)
+
+    async def test_tag_filter_matches_sync_view(self):
+        params = {"tags": "python,backend", "mode": "any", "page_size": 1}
+        async_response = await self._async_get(reverse("async-snippet-overview-api"), **params)
+        await cache.aclear()
+        tiered_cache.clear_local()
+        sync_response = await sync_to_async(self.client.get)(reverse("snippet-overview-api"), params)
+        self.assertEqual(json.loads(async_response.content), sync_response.json())
+        self.assertEqual([s["title"] for s in sync_response.json()["data"]["snippets"]], ["Second"])
+
+    async def test_requires_auth(self):
+        response = await self.async_client.get(reverse("async-tag-list-api"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_inactive_user_is_rejected_like_sync_views(self):
+        await User.objects.filter(pk=self.user.pk).aupdate(is_active=False)
+        response = await self._async_get(reverse("async-tag-list-api"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_detail_not_accessible_by_other_user(self):
+        await sync_to_async(self._authenticate)(self.other_user)
+        response = await self._async_get(reverse("async-snippet-detail-api", kwargs={"id": self.snippet_id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
 class TagDetailTest(BaseSnippetTest):
     def setUp(self):
         super().setUp()
@@ -177,7 +753,522 @@ class TagDetailTest(BaseSnippetTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data["data"]["snippets"]), 2)
 
+    def test_snippets_are_paginated_newest_first(self):
+        self._create_snippet(title="Third", tag_titles=["backend", "other"])
+        self._authenticate(self.other_user)
+        self._create_snippet(title="Bob's", tag_titles=["backend"])
+        self._authenticate(self.user)
+
+        url = reverse("snippets-linked-tag", kwargs={"id": self.tag.pk})
+        first = self.client.get(url, {"page_size": 2}).data["data"]
+        self.assertEqual([s["title"] for s in first["snippets"]], ["Third", "Second"])
+        second = self.client.get(url, {"page_size": 2, "cursor": first["next_cursor"]}).data["data"]
+        self.assertEqual([s["title"] for s in second["snippets"]], ["First"])
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(self.client.get(url, {"cursor": "bogus"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ties_are_broken_on_the_snippet_id_like_the_overview(self):
+        moment = timezone.now()
+        Snippet.objects.filter(created_by=self.user).update(created_on=moment)
+        SnippetTag.objects.filter(tag=self.tag).update(created_on=moment)
+        url = reverse("snippets-linked-tag", kwargs={"id": self.tag.pk})
+        first = self.client.get(url, {"page_size": 1}).data["data"]
+        second = self.client.get(url, {"page_size": 1, "cursor": first["next_cursor"]}).data["data"]
+        ids = [first["snippets"][0]["id"], second["snippets"][0]["id"]]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        overview = self.client.get(reverse("snippet-overview-api"), {"page_size": 1}).data["data"]
+        self.assertEqual(first["next_cursor"], overview["next_cursor"])
+
+    def test_links_carry_owner_and_creation_time(self):
+        body = b'{"title": "Imported", "note": "n", "tag_titles": ["backend"]}\n'
+        self.client.post(reverse("snippet-import-api"), data=body, content_type="application/x-ndjson")
+        for link in SnippetTag.objects.select_related("snippet"):
+            self.assertEqual((link.created_by_id, link.created_on), (link.snippet.created_by_id, link.snippet.created_on))
+        self.assertEqual(SnippetTag.objects.filter(tag=self.tag).count(), 3)
+
     def test_nonexistent_tag_returns_404(self):
         url = reverse("snippets-linked-tag", kwargs={"id": 99999})
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PrecomputedDetailUrlTest(BaseSnippetTest):
+    def test_matches_hyperlinked_identity_field(self):
+        class ReverseEveryRow(SnippetOverviewSerializer):
+            detail_url = serializers.HyperlinkedIdentityField(view_name="snippet-detail-api", lookup_field="id")
+
+        snippets = [Snippet(id=pk, title=f"note {pk}") for pk in (1, 42, 10 ** 12)]
+        for host in ("testserver", "api.example.com:8443"):
+            request = Request(APIRequestFactory().get("/snippet/overview/", HTTP_HOST=host))
+            context = {"request": request}
+            self.assertEqual(
+                render_json(SnippetOverviewSerializer(snippets, many=True, context=context).data),
+                render_json(ReverseEveryRow(snippets, many=True, context=context).data),
+            )
+
+
+class FastReadSerializationTest(BaseSnippetTest):
+    """The plain-dict payloads must be byte-identical to the DRF serializers'."""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            self._create_snippet(title=f"note {i}", tag_titles=["python", "sql"] if i % 2 else ["python"])
+        self.tag_id = Tag.objects.get(title="python").pk
+
+    def _get(self, url, fast):
+        cache.clear()
+        tiered_cache.clear_local()
+        with self.settings(FAST_READ_SERIALIZATION=fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return response
+
+    def test_payloads_match_serializers(self):
+        overview = reverse("snippet-overview-api")
+        next_cursor = self._get(overview + "?page_size=2", fast=False).data["data"]["next_cursor"]
+        urls = [
+            overview,
+            overview + "?page_size=2",
+            f"{overview}?page_size=2&cursor={next_cursor}",
+            reverse("tag-list-api"),
+            reverse("tag-list-api") + "?sort=popular",
+            reverse("snippets-linked-tag", kwargs={"id": self.tag_id}),
+            reverse("snippets-linked-tag", kwargs={"id": self.tag_id}) + "?page_size=2",
+        ]
+        for url in urls:
+            self.assertEqual(self._get(url, fast=True).content, self._get(url, fast=False).content, url)
+
+    def test_missing_tag_returns_404(self):
+        with self.settings(FAST_READ_SERIALIZATION=True):
+            response = self.client.get(reverse("snippets-linked-tag", kwargs={"id": 99999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        self.snippet_id = self._create_snippet(title="First", tag_titles=["python"]).data["data"]["id"]
+        self.tag_id = Tag.objects.get(title="python").pk
+        self.urls = [
+            reverse("snippet-overview-api"),
+            reverse("snippet-detail-api", kwargs={"id": self.snippet_id}),
+            reverse("tag-list-api"),
+            reverse("tag-list-api") + "?sort=popular",
+            reverse("snippets-linked-tag", kwargs={"id": self.tag_id}),
+        ]
+
+    def test_matching_etag_returns_304_without_queries(self):
+        for url in self.urls:
+            etag = self.client.get(url)["ETag"]
+            self.assertEqual(self.client.get(url)["ETag"], etag, url)  # a cache hit answers with the same tag
+            with self.assertNumQueries(1):  # user
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response["ETag"], etag)
+
+    def test_write_changes_etag(self):
+        urls = [self.urls[0], self.urls[1], self.urls[4]]  # the tags themselves do not change
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+        self.client.put(
+            reverse("snippet-detail-api", kwargs={"id": self.snippet_id}),
+            {"title": "Renamed", "note": "changed", "tag_titles": ["python"]}, format="json",
+        )
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertNotEqual(response["ETag"], etag, url)
+
+    def test_overview_etag_covers_total(self):
+        url = reverse("snippet-overview-api")
+        etag = self.client.get(url)["ETag"]
+        cache.set(snippet_count_key(self.user.pk), 7)
+        tiered_cache.clear_local()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_overview_304_outlives_the_soft_ttl_without_queries(self):
+        url = reverse("snippet-overview-api")
+        etag = self.client.get(url)["ETag"]
+        tiered_cache.clear_local()
+        stale_at = time.time() + settings.CACHE_TTLS["snippet_list"][0] + 100
+        with mock.patch("time.time", return_value=stale_at), mock.patch("utils.response_cache._schedule_refresh"):
+            with self.assertNumQueries(1):  # user
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_async_view(self):
+        url = reverse("async-snippet-overview-api")
+        headers = {"authorization": f"Bearer {self.access_token}"}
+        etag = (await self.async_client.get(url, headers=headers))["ETag"]
+        response = await self.async_client.get(url, headers={**headers, "if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class FastJSONRendererTest(APITestCase):
+    """The renderer must produce exactly what DRF's JSONRenderer does, with or without orjson."""
+
+    payload = {
+        "created_on": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "day": date(2024, 5, 1),
+        "price": Decimal("1.50"),
+        "label": gettext_lazy("Snippet"),
+        "title": "na\u00efve \u2615 \u2028 \u2029 \"quoted\"",
+        "nested": [{"id": 10 ** 12, "tags": ("a", "b")}, None, True, 1.5],
+        1: "int key",
+        "huge": 2 ** 70,
+    }
+
+    def test_matches_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_indent_matches_json_renderer(self):
+        media_type = "application/json; indent=2"
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload, media_type), JSONRenderer().render(self.payload, media_type)
+        )
+
+    def test_without_orjson(self):
+        with mock.patch("utils.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+
+class QueryCountTest(BaseSnippetTest):
+    """
+    Exact query budgets for the hot paths, with a cold cache.  JWT
+    authentication always loads the user, which is the first query.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            self.snippet_id = self._create_snippet(title=f"note {i}", tag_titles=["python"]).data["data"]["id"]
+        self.tag_id = Tag.objects.get(title="python").pk
+        cache.clear()
+        tiered_cache.clear_local()
+
+    def test_overview(self):
+        # user, page rows, the snippet counter
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("snippet-overview-api") + "?page_size=2")
+        self.assertEqual(response.data["data"]["total_snippets"], 3)
+
+    def test_overview_total_comes_from_counter(self):
+        Profile.objects.filter(user=self.user).update(snippet_count=42)
+        response = self.client.get(reverse("snippet-overview-api") + "?page_size=2")
+        self.assertEqual(response.data["data"]["total_snippets"], 42)
+
+    def test_overview_cached(self):
+        url = reverse("snippet-overview-api")
+        self.client.get(url)
+        with self.assertNumQueries(1):  # user
+            self.client.get(url)
+
+    def test_tag_detail(self):
+        # user, tag, one page of links joined to their snippets
+        with self.assertNumQueries(3):
+            self.client.get(reverse("snippets-linked-tag", kwargs={"id": self.tag_id}))
+
+    def test_delete(self):
+        # user, snippet, its tags, then in one transaction (savepoint and release
+        # under the test case's transaction): tag counters, snippet counter,
+        # tombstone, tag links, snippet; and the remaining total from the counter.
+        with self.assertNumQueries(11):
+            response = self.client.delete(reverse("snippet-detail-api", kwargs={"id": self.snippet_id}))
+        self.assertEqual(response.data["data"]["total_snippets_remaining"], 2)
+
+
+class RenderedResponseCacheTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        self.snippet_id = self._create_snippet(tag_titles=["python"]).data["data"]["id"]
+
+    def _fetch_twice(self, url):
+        cache.clear()
+        tiered_cache.clear_local()
+        return self.client.get(url), self.client.get(url)
+
+    def test_rendered_bodies_match_drf_rendering(self):
+        tag_id = Tag.objects.get(title="python").pk
+        urls = [
+            reverse("snippet-overview-api"),
+            reverse("snippet-detail-api", kwargs={"id": self.snippet_id}),
+            reverse("tag-list-api"),
+            reverse("tag-list-api") + "?sort=popular",
+            reverse("snippets-linked-tag", kwargs={"id": tag_id}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with override_settings(CACHE_RENDERED_RESPONSES=False):
+                    plain = self._fetch_twice(url)
+                rendered = self._fetch_twice(url)
+                self.assertEqual([r.content for r in rendered], [r.content for r in plain])
+
+    def test_hit_is_served_from_rendered_bytes(self):
+        url = reverse("snippet-detail-api", kwargs={"id": self.snippet_id})
+        miss, hit = self._fetch_twice(url)
+        self.assertEqual(miss.data["message"], "Snippet retrieved successfully.")
+        self.assertEqual(hit.data["message"], "Snippet retrieved from cache.")
+        self.assertEqual(hit.data["data"], miss.data["data"])
+        self.assertEqual(hit["Content-Type"], "application/json")
+
+    def test_hit_honours_content_negotiation(self):
+        url = reverse("snippet-detail-api", kwargs={"id": self.snippet_id})
+        for accept in ["application/json; indent=2", "text/html"]:
+            with self.subTest(accept=accept):
+                cache.clear()
+                tiered_cache.clear_local()
+                miss = self.client.get(url, HTTP_ACCEPT=accept)
+                hit = self.client.get(url, HTTP_ACCEPT=accept)
+                self.assertEqual(hit["Content-Type"], miss["Content-Type"])
+                self.assertEqual(hit.data["data"], miss.data["data"])
+                if accept.startswith("application/json"):
+                    self.assertEqual(hit.content, miss.content.replace(b"retrieved successfully", b"retrieved from cache"))
+
+
+class WriteThroughCacheTest(BaseSnippetTest):
+    def setUp(self):
+        super().setUp()
+        self.overview_url = reverse("snippet-overview-api") + "?page_size=3"
+        self.first_id = self._create_snippet(title="first").data["data"]["id"]
+        self.client.get(self.overview_url)  # cache the first page
+
+    def _cached_then_fresh(self, url):
+        cached = self.client.get(url)
+        cache.clear()
+        tiered_cache.clear_local()
+        return cached, self.client.get(url)
+
+    def test_create_sets_detail_key(self):
+        snippet_id = self._create_snippet(title="second", tag_titles=["python"]).data["data"]["id"]
+        cached, fresh = self._cached_then_fresh(reverse("snippet-detail-api", kwargs={"id": snippet_id}))
+        self.assertEqual(cached.data["message"], "Snippet retrieved from cache.")
+        self.assertEqual(cached.data["data"], fresh.data["data"])
+
+    def test_create_update_and_delete_patch_cached_page(self):
+        second_id = self._create_snippet(title="second").data["data"]["id"]
+        url = reverse("snippet-detail-api", kwargs={"id": self.first_id})
+        self.client.put(url, {"title": "renamed", "note": "Hello world"}, format="json")
+        self.client.delete(reverse("snippet-detail-api", kwargs={"id": second_id}))
+        self._create_snippet(title="third")
+
+        cached, fresh = self._cached_then_fresh(self.overview_url)
+        self.assertEqual(cached.data["message"], "Snippets retrieved from cache.")
+        self.assertEqual(cached.data["data"], fresh.data["data"])
+        self.assertEqual([s["title"] for s in cached.data["data"]["snippets"]], ["third", "renamed"])
+        self.assertEqual(cached.data["data"]["total_snippets"], 2)
+
+    def test_page_past_soft_ttl_is_still_patched(self):
+        second_id = self._create_snippet(title="second").data["data"]["id"]
+        stale_at = time.time() + settings.CACHE_TTLS["snippet_list"][0] + 100
+        tiered_cache.clear_local()
+        with mock.patch("time.time", return_value=stale_at), mock.patch("utils.response_cache._schedule_refresh"):
+            self.client.delete(reverse("snippet-detail-api", kwargs={"id": second_id}))
+            response = self.client.get(self.overview_url)
+        self.assertEqual(response.data["message"], "Snippets retrieved from cache.")
+        self.assertEqual([s["title"] for s in response.data["data"]["snippets"]], ["first"])
+        self.assertEqual(response.data["data"]["total_snippets"], 1)
+
+    def test_older_update_does_not_overwrite_newer_detail(self):
+        url = reverse("snippet-detail-api", kwargs={"id": self.first_id})
+        self.client.put(url, {"title": "older", "note": "Hello world"}, format="json")
+        older = Snippet.objects.get(pk=self.first_id)
+        older_detail = self.client.get(url).data["data"]
+        self.client.put(url, {"title": "newer", "note": "Hello world"}, format="json")
+        # The older PUT's cache write arrives last.
+        write_through_snippet(
+            self.user.pk, (older.created_on, older.id), {"id": older.id, "title": "older"}, "replace",
+            detail=older_detail, detail_message="Snippet retrieved from cache.", updated_on=older.updated_on,
+        )
+        self.assertIsNone(cache.get(snippet_detail_key(self.user.pk, self.first_id)))
+        self.assertEqual(self.client.get(url).data["data"]["title"], "newer")
+
+    def _overview_item(self, snippet):
+        request = Request(APIRequestFactory().get("/"))
+        return SnippetOverviewSerializer(snippet, context={"request": request}).data
+
+    def test_inserts_patched_out_of_order_keep_page_order(self):
+        older = Snippet.objects.create(created_by=self.user, title="older", note="n")
+        newer = Snippet.objects.create(created_by=self.user, title="newer", note="n")
+        Profile.objects.adjust_snippet_count(self.user, 2)
+        for snippet in (newer, older):  # committed in one order, patched in the other
+            write_through_snippet(
+                self.user.pk, (snippet.created_on, snippet.id), self._overview_item(snippet), "insert",
+                updated_on=snippet.updated_on,
+            )
+        cached, fresh = self._cached_then_fresh(self.overview_url)
+        self.assertEqual(cached.data["message"], "Snippets retrieved from cache.")
+        self.assertEqual([s["title"] for s in cached.data["data"]["snippets"]], ["newer", "older", "first"])
+        self.assertEqual(cached.data["data"], fresh.data["data"])
+
+    def test_older_update_does_not_overwrite_newer_page_row(self):
+        url = reverse("snippet-detail-api", kwargs={"id": self.first_id})
+        self.client.put(url, {"title": "older", "note": "Hello world"}, format="json")
+        older = Snippet.objects.get(pk=self.first_id)
+        self.client.put(url, {"title": "newer", "note": "Hello world"}, format="json")
+        write_through_snippet(
+            self.user.pk, (older.created_on, older.id), self._overview_item(older), "replace",
+            updated_on=older.updated_on,
+        )
+        response = self.client.get(self.overview_url)
+        self.assertEqual(response.data["message"], "Snippets retrieved successfully.")  # the page was dropped
+        self.assertEqual([s["title"] for s in response.data["data"]["snippets"]], ["newer"])
+
+    def test_writes_drop_the_count_and_reads_do_not_overwrite_it(self):
+        count_key = snippet_count_key(self.user.pk)
+        self.assertEqual(cache.get(count_key), 1)
+        self._create_snippet(title="second")
+        self.assertIsNone(cache.get(count_key))
+        store_snippet_count(self.user.pk, 2)
+        store_snippet_count(self.user.pk, 1)  # read before the write, lands after it
+        self.assertEqual(cache.get(count_key), 2)
+
+    def test_insert_into_full_page_drops_it(self):
+        for title in ("second", "third"):
+            self._create_snippet(title=title)
+        self._create_snippet(title="fourth")
+        cached, fresh = self._cached_then_fresh(self.overview_url)
+        self.assertEqual(cached.data["message"], "Snippets retrieved successfully.")
+        self.assertEqual(cached.data["data"], fresh.data["data"])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StampedeProtectionTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.builds = 0
+
+    def _build(self, delay=0.0):
+        def build():
+            self.builds += 1
+            time.sleep(delay)
+            return {"value": self.builds}
+        return build
+
+    def _fetch(self, build, key="k"):
+        return cached_or_build(key, build, "tag_list", message="built", cached_message="cached")
+
+    def test_concurrent_misses_rebuild_once(self):
+        barrier = threading.Barrier(5)
+        responses = []
+
+        def worker():
+            barrier.wait()
+            responses.append(self._fetch(self._build(delay=0.2)))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.builds, 1)
+        self.assertEqual({r.data["data"]["value"] for r in responses}, {1})
+        self.assertEqual(sorted(r.data["message"] for r in responses), ["built"] + ["cached"] * 4)
+
+    @override_settings(CACHE_STAMPEDE={**settings.CACHE_STAMPEDE, "LOCK_WAIT": 0.1})
+    def test_builds_without_lock_when_holder_never_stores(self):
+        cache.add("lock:k", "someone-else", timeout=60)
+        self.assertEqual(self._fetch(self._build()).data["data"], {"value": 1})
+
+    def test_early_refresh_probability_grows_near_expiry(self):
+        far = make_entry({}, "cached", timeout=3600, delta=0.01)
+        near = make_entry({}, "cached", timeout=0, delta=0.01)
+        self.assertFalse(should_refresh_early(far))
+        self.assertTrue(should_refresh_early(near))
+        self.assertFalse(should_refresh_early(near._replace(delta=0.0)))
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        tiered_cache.set("k", make_entry({"value": 0}, "cached", timeout=-1), timeout=60)
+        response = self._fetch(self._build(delay=0.1))
+        self.assertEqual(response.data["data"], {"value": 0})
+        self.assertEqual(response.data["message"], "cached")
+
+        deadline = time.monotonic() + 5
+        while cache.get("lock:k") is not None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(self._fetch(self._build()).data["data"], {"value": 1})
+
+    def test_early_refresh_serves_current_entry_while_locked(self):
+        tiered_cache.set("k", make_entry({"value": 0}, "cached", timeout=0.5, delta=10), timeout=60)
+        cache.add("lock:k", "someone-else", timeout=60)
+        self.assertEqual(self._fetch(self._build()).data["data"], {"value": 0})
+        self.assertEqual(self.builds, 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CacheGenerationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+
+    def test_tag_invalidation_orphans_list_and_detail_keys(self):
+        list_key, detail_key = tag_list_key(), tag_detail_key(1, 1)
+        cache.set(list_key, ["cached"])
+        invalidate_all_tag_caches()
+        self.assertNotEqual(tag_list_key(), list_key)
+        self.assertNotEqual(tag_detail_key(1, 1), detail_key)
+        self.assertIsNone(cache.get(tag_list_key()))
+
+    def test_generation_counters_expire(self):
+        scope = tag_detail_scope(1, 1)
+        first = get_generation(scope)
+        bump_generation(scope)  # restarts the TTL
+        hard_ttl = max(hard for _, hard in settings.CACHE_TTLS.values())
+        now = time.time()
+        with mock.patch("time.time", return_value=now + hard_ttl - 1):
+            self.assertEqual(cache.get(generation_key(scope)), first + 1)
+        with mock.patch("time.time", return_value=now + hard_ttl + 1):
+            self.assertIsNone(cache.get(generation_key(scope)))
+
+    def test_full_snippet_invalidation_is_scoped_to_user(self):
+        own, other = snippet_list_key(1), snippet_list_key(2)
+        invalidate_snippet_caches(1)
+        self.assertNotEqual(snippet_list_key(1), own)
+        self.assertEqual(snippet_list_key(2), other)
+
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TieredCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        tiered_cache.reset_stats()
+
+    def test_second_read_is_served_locally(self):
+        tiered_cache.set("k", {"v": 1}, timeout=60)
+        tiered_cache.clear_local()
+        self.assertEqual(tiered_cache.get("k"), {"v": 1})
+        self.assertEqual(tiered_cache.get("k"), {"v": 1})
+        self.assertEqual(tiered_cache.stats["local"], {"hits": 1, "misses": 1})
+        self.assertEqual(tiered_cache.stats["redis"], {"hits": 1, "misses": 0})
+
+    def test_delete_evicts_local_tier(self):
+        tiered_cache.set("k", "v", timeout=60)
+        tiered_cache.delete_many(["k"])
+        self.assertIsNone(tiered_cache.get("k"))
+
+    def test_generation_bump_is_seen_despite_local_tier(self):
+        before = tag_list_key()
+        invalidate_all_tag_caches()
+        self.assertNotEqual(tag_list_key(), before)
+
+    def test_lru_is_size_bounded(self):
+        lru = LocalLRUCache(max_entries=2)
+        lru.set("a", 1, ttl=60)
+        lru.set("b", 2, ttl=60)
+        lru.get("a")
+        lru.set("c", 3, ttl=60)
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNot(lru.get("b"), 2)
+
+    def test_stats_endpoint_is_admin_only(self):
+        user = User.objects.create_user(username="carol", password="pass1234")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get(reverse("cache-stats-api")).status_code, status.HTTP_403_FORBIDDEN)
+        admin = User.objects.create_superuser(username="root", password="pass1234")
+        self.client.force_authenticate(admin)
+        response = self.client.get(reverse("cache-stats-api"))
+        self.assertEqual(set(response.data["data"]), {"local", "redis"})
@@ -1,11 +1,26 @@
 from django.urls import path
-from .views import SnippetCreateView, SnippetDetailView, TagListView, TagDetailView, SnippetOverviewView
+from .async_views import AsyncSnippetDetailView, AsyncSnippetOverviewView, AsyncTagDetailView, AsyncTagListView
+from .views import SnippetCreateView, SnippetDetailView, TagListView, AllTagListView, TagSuggestView, TagDetailView, SnippetOverviewView, SnippetImportView, SnippetExportView, SnippetSearchView, SnippetChangesView, CacheStatsView
 
 urlpatterns = [
     path("snippet/overview/", SnippetOverviewView.as_view(), name='snippet-overview-api'),
+    path("snippet/search/", SnippetSearchView.as_view(), name="snippet-search-api"),
+    path("snippet/changes/", SnippetChangesView.as_view(), name="snippet-changes-api"),
     path("snippet/create/", SnippetCreateView.as_view(), name="create-snippet-api"),
+    path("snippet/import/", SnippetImportView.as_view(), name="snippet-import-api"),
+    path("snippet/export/", SnippetExportView.as_view(), name="snippet-export-api"),
     path("snippet/<int:id>/", SnippetDetailView.as_view(), name="snippet-detail-api"),
 
     path("tags/", TagListView.as_view(), name="tag-list-api"),
-    path("tags/<int:id>/", TagDetailView.as_view(), name="snippets-linked-tag")
+    path("tags/all/", AllTagListView.as_view(), name="tag-all-list-api"),
+    path("tags/suggest/", TagSuggestView.as_view(), name="tag-suggest-api"),
+    path("tags/<int:id>/", TagDetailView.as_view(), name="snippets-linked-tag"),
+
+    path("cache/stats/", CacheStatsView.as_view(), name="cache-stats-api"),
+
+    # async read paths for the ASGI entry point, same payloads as above
+    path("async/snippet/overview/", AsyncSnippetOverviewView.as_view(), name="async-snippet-overview-api"),
+    path("async/snippet/<int:id>/", AsyncSnippetDetailView.as_view(), name="async-snippet-detail-api"),
+    path("async/tags/", AsyncTagListView.as_view(), name="async-tag-list-api"),
+    path("async/tags/<int:id>/", AsyncTagDetailView.as_view(), name="async-snippets-linked-tag"),
                ]
\ No newline at end of file
@@ -1,53 +1,352 @@
 import logging
 import traceback
+from functools import partial
 from django.conf import settings
 from django.http import Http404
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.cache import cache
-from django.db.models import Prefetch
+from django.db import transaction
+from django.db.models import Count, F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
-from .serializers import SnippetWriteSerializer, SnippetDetailSerializer, SnippetOverviewSerializer, TagSerializer, TagDetailSerializer
+from .serializers import SnippetWriteSerializer, SnippetDetailSerializer, SnippetOverviewSerializer, TagSerializer, TagUsageSerializer
 from utils.permissions import IsAdminUser
 from utils.custom_response import ApiResponse
-from .models import Snippet, Tag
+from accounts.models import Profile
+from .models import Snippet, SnippetTag, SnippetTombstone, Tag, TagDiff, TagUsage, normalize_tag_titles
+from .bulk import export_snippets, import_snippets
+from .pagination import InvalidCursor, decode_cursor, paginate_keyset
+from .search import normalize_query, search_snippets
+from .suggest import normalize_prefix, suggest_tags
+from .sync import InvalidSyncToken, changes_since, decode_sync_token, encode_sync_token, tombstone_cutoff
+from . import fast_serializers
+from utils.response_cache import cached_or_build
+from utils.tiered_cache import tiered_cache
 from utils.cache_utils import (
     invalidate_snippet_caches,
-    invalidate_tag_caches,
+    invalidate_tag_diff,
+    register_snippet_page,
+    snippet_count_key,
+    store_snippet_count,
     snippet_detail_key,
-    snippet_list_key,
+    snippet_filter_key,
+    snippet_page_key,
+    snippet_search_key,
     tag_detail_key,
     tag_list_key,
+    user_tag_list_key,
+    write_through_snippet,
 )
 
 logger = logging.getLogger(__name__)
 
 
+def _page_size(request):
+    try:
+        page_size = int(request.query_params.get("page_size", settings.SNIPPET_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.SNIPPET_PAGE_SIZE
+    return max(1, min(page_size, settings.SNIPPET_MAX_PAGE_SIZE))
+
+
+def snippet_total(user):
+    """The user's snippet count from the cache, else from the maintained ``Profile`` counter."""
+    cache_key = snippet_count_key(user.pk)
+    total = tiered_cache.get(cache_key)
+    if total is None:
+        total = Profile.objects.snippet_count(user)
+        store_snippet_count(user.pk, total)
+    return total
+
+
+def page_total(page, cursor):
+    """The total known from a fetched overview page: its length when it is the only page, else ``None``."""
+    if cursor is None and page.next_cursor is None:
+        return len(page.items)
+    return None
+
+
+def overview_rows(snippets):
+    """
+    Restrict ``snippets`` to the overview columns: named ``values_list()`` rows
+    under ``FAST_READ_SERIALIZATION``, deferred model instances otherwise.  Both
+    expose the fields as attributes for the keyset pagination.
+    """
+    if settings.FAST_READ_SERIALIZATION:
+        return snippets.values_list(*fast_serializers.OVERVIEW_FIELDS, named=True)
+    return snippets.only(*fast_serializers.OVERVIEW_FIELDS)
+
+
+TAG_FILTER_MODES = ("all", "any")
+
+
+def tag_filter(params):
+    """
+    The overview's ``?tags=a,b&mode=all|any`` as ``(titles, mode)``, the titles
+    normalised and sorted so equivalent filters share a cache key, or ``None``
+    without tags.  Raises ``ValueError`` for an unknown mode.
+    """
+    titles = sorted(normalize_tag_titles(params.get("tags", "").split(",")))
+    if not titles:
+        return None
+    mode = params.get("mode", "all")
+    if mode not in TAG_FILTER_MODES:
+        raise ValueError("mode must be 'all' or 'any'.")
+    return titles, mode
+
+
+def tagged_snippets(user, titles, mode):
+    """
+    The user's snippets carrying all (``mode="all"``) or any of the tags titled
+    ``titles``, as one query: a semi-join on their ``SnippetTag`` links, which
+    the ``(tag, created_by, created_on, snippet)`` index serves.  For ``all``
+    the links are grouped by snippet and kept ``HAVING COUNT(*) = len(titles)``,
+    so the database intersects the tags instead of the client.
+    """
+    links = SnippetTag.objects.filter(created_by=user, tag__title__in=titles)
+    if mode == "all" and len(titles) > 1:
+        links = links.values("snippet_id").annotate(matched=Count("id")).filter(matched=len(titles))
+    return Snippet.objects.filter(created_by=user, id__in=links.values("snippet_id"))
+
+
+def tag_filter_payload(titles, mode, page, request) -> dict:
+    return {
+        "tags": titles,
+        "mode": mode,
+        "snippets": overview_data(page.items, request),
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+
+
+def overview_data(rows, request):
+    if settings.FAST_READ_SERIALIZATION:
+        return fast_serializers.overview_items(rows, request)
+    return SnippetOverviewSerializer(rows, many=True, context={"request": request}).data
+
+
+def tag_rows():
+    """Tags as ``values()`` dicts under ``FAST_READ_SERIALIZATION``, model instances otherwise."""
+    if settings.FAST_READ_SERIALIZATION:
+        return Tag.objects.values(*fast_serializers.TAG_FIELDS)
+    return Tag.objects.all()
+
+
+def tag_data(tag):
+    if settings.FAST_READ_SERIALIZATION:
+        return fast_serializers.tag_item(tag)
+    return TagSerializer(tag).data
+
+
+def user_tag_rows(user, sort):
+    """
+    The user's tags as ``TagUsage`` rows, by title or, for ``sort="popular"``,
+    most used first: ``values()`` dicts under ``FAST_READ_SERIALIZATION``, model
+    instances otherwise.
+    """
+    usages = TagUsage.objects.filter(user=user, snippet_count__gt=0)
+    if sort == "popular":
+        usages = usages.order_by("-snippet_count", "tag__title")
+    else:
+        usages = usages.order_by("tag__title")
+    if settings.FAST_READ_SERIALIZATION:
+        return usages.values(*fast_serializers.TAG_USAGE_FIELDS)
+    return usages.select_related("tag")
+
+
+def user_tag_payload(rows, total, page, page_size) -> dict:
+    if settings.FAST_READ_SERIALIZATION:
+        tags = fast_serializers.tag_usage_items(rows)
+    else:
+        tags = TagUsageSerializer(rows, many=True).data
+    return {
+        "total_tags": total,
+        "page": page,
+        "next_page": page + 1 if page * page_size < total else None,
+        "tags": tags,
+    }
+
+
+def tag_snippet_rows(links):
+    """
+    ``SnippetTag`` links with what the overview needs of their snippet.  The
+    keyset pagination runs on ``(created_on, snippet_id)`` like every other
+    snippet listing, which the ``(tag, created_by, created_on, snippet)`` index
+    covers, so a page is one range scan.  Paginate with ``id_field="snippet_id"``.
+    """
+    if settings.FAST_READ_SERIALIZATION:
+        return links.annotate(title=F("snippet__title"), updated_on=F("snippet__updated_on")).values_list(
+            "created_on", "snippet_id", "title", "updated_on", named=True
+        )
+    return links.select_related("snippet").only(
+        "created_on", "snippet__id", "snippet__title", "snippet__created_on", "snippet__updated_on"
+    )
+
+
+def tag_snippet_data(rows, request):
+    if settings.FAST_READ_SERIALIZATION:
+        return fast_serializers.tag_snippet_items(rows, request)
+    return SnippetOverviewSerializer([link.snippet for link in rows], many=True, context={"request": request}).data
+
+
+def tag_detail_payload(tag, page, request) -> dict:
+    return {
+        **tag_data(tag),
+        "snippets": tag_snippet_data(page.items, request),
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+    }
+
+
 class SnippetOverviewView(APIView):
+    """
+    One page of the user's snippets, newest first, with their total.  With
+    ``?tags=a,b`` only the snippets carrying all of those tags, or with
+    ``&mode=any`` any of them, and no total.
+    """
+
     permission_classes = [IsAuthenticated]
 
+    def _total(self, user):
+        return {"total_snippets": snippet_total(user)}
+
+    def _build_page(self, request, cache_key, cursor, page_size):
+        page = paginate_keyset(overview_rows(Snippet.objects.filter(created_by=request.user)), cursor, page_size)
+        total = page_total(page, cursor)
+        if total is not None:  # the count then needs no lookup of its own
+            store_snippet_count(request.user.pk, total)
+        page_payload = {
+            "snippets": overview_data(page.items, request),
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+        logger.info(f"Adding in cache key {cache_key}, {page_payload}")
+        register_snippet_page(request.user.pk, cache_key, {**page.bounds, "size": page_size})
+        return page_payload
+
+    def _build_filtered_page(self, request, cache_key, titles, mode, cursor, page_size):
+        page = paginate_keyset(overview_rows(tagged_snippets(request.user, titles, mode)), cursor, page_size)
+        page_payload = tag_filter_payload(titles, mode, page, request)
+        logger.info(f"Adding in cache key {cache_key}, {page_payload}")
+        return page_payload
+
     def get(self, request):
         try:
-            cache_key = snippet_list_key(request.user.pk)
-            cached = cache.get(cache_key)
-            if cached is not None:
-                return ApiResponse.success(data=cached, message="Snippets retrieved from cache.")
-
-            snippets = Snippet.objects.filter(created_by=request.user).only("id", "title")
-            serializer = SnippetOverviewSerializer(snippets, many=True, context={"request": request})
-            payload = {
-                "total_snippets": snippets.count(),
-                "snippets": serializer.data,
-            }
-            logger.info(f"Adding in cache key {cache_key}, {payload}")
-            cache.set(cache_key, payload, timeout=settings.CACHE_TTL_SNIPPET_LIST)
-            return ApiResponse.success(data=payload, message="Snippets retrieved successfully.")
+            token = request.query_params.get("cursor") or None
+            page_size = _page_size(request)
+            try:
+                cursor = decode_cursor(token) if token else None
+            except InvalidCursor as e:
+                return ApiResponse.error(message=str(e))
+            try:
+                tags = tag_filter(request.query_params)
+            except ValueError as e:
+                return ApiResponse.error(message="Snippet overview failed.", errors={"mode": str(e)})
+
+            if tags is not None:
+                titles, mode = tags
+                cache_key = snippet_filter_key(request.user.pk, titles, mode, page_size, token)
+                return cached_or_build(
+                    cache_key, partial(self._build_filtered_page, request, cache_key, titles, mode, cursor, page_size),
+                    "snippet_list", message="Snippets retrieved successfully.", cached_message="Snippets retrieved from cache.",
+                    if_none_match=request.headers.get("If-None-Match"),
+                )
+
+            # Read after the page: a rebuild of the only page already caches its length.
+            extra = partial(self._total, request.user)
+            cache_key = snippet_page_key(request.user.pk, page_size, token)
+            return cached_or_build(
+                cache_key, lambda: self._build_page(request, cache_key, cursor, page_size), "snippet_list",
+                message="Snippets retrieved successfully.", cached_message="Snippets retrieved from cache.", extra=extra,
+                if_none_match=request.headers.get("If-None-Match"),
+            )
         except Exception as e:
             logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
             return ApiResponse.exception(message="An error occured", errors=str(e))
         
 
+class SnippetSearchView(APIView):
+    """Ranked full-text search over the user's snippet titles and notes, ``?q=&page=&page_size=``."""
+    permission_classes = [IsAuthenticated]
+
+    def _build_results(self, request, cache_key, query, page, page_size):
+        total, hits = search_snippets(request.user, query, page, page_size)
+        serializer = SnippetOverviewSerializer(hits, many=True, context={"request": request})
+        results = [
+            {**result, "score": round(float(hit.score), 4)} for result, hit in zip(serializer.data, hits)
+        ]
+        payload = {
+            "query": query,
+            "total_results": total,
+            "page": page,
+            "next_page": page + 1 if page * page_size < total else None,
+            "results": results,
+        }
+        logger.info(f"Adding in cache key {cache_key}, {payload}")
+        return payload
+
+    def get(self, request):
+        try:
+            query = normalize_query(request.query_params.get("q", ""))
+            if not query:
+                return ApiResponse.error(message="Search failed.", errors={"q": "A search query is required."})
+            try:
+                page = max(1, int(request.query_params.get("page", 1)))
+                page_size = int(request.query_params.get("page_size", settings.SNIPPET_PAGE_SIZE))
+            except ValueError:
+                return ApiResponse.error(message="Search failed.", errors="page and page_size must be integers.")
+            page_size = max(1, min(page_size, settings.SNIPPET_MAX_PAGE_SIZE))
+
+            cache_key = snippet_search_key(request.user.pk, query, page, page_size)
+            return cached_or_build(
+                cache_key, lambda: self._build_results(request, cache_key, query, page, page_size), "snippet_search",
+                message="Search results retrieved successfully.", cached_message="Search results retrieved from cache.",
+            )
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+class SnippetChangesView(APIView):
+    """
+    Delta sync for clients that keep a local copy: the snippets created or
+    updated since ``?since=``, oldest first, and the ids of those deleted.
+    Without ``since`` every snippet is returned.  Pass ``next_since`` back as
+    ``since``, right away while ``has_more`` is true.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            token = request.query_params.get("since") or None
+            try:
+                since = decode_sync_token(token) if token else None
+            except InvalidSyncToken as e:
+                return ApiResponse.error(message=str(e))
+            if since is not None and since < tombstone_cutoff():
+                return ApiResponse.error(
+                    message="Sync token expired, sync again without since.", status_code=status.HTTP_410_GONE
+                )
+
+            batch = changes_since(request.user, since, _page_size(request))
+            serializer = SnippetDetailSerializer(batch.snippets, many=True, context={"request": request})
+            return ApiResponse.success(
+                message="Snippet changes retrieved successfully.",
+                data={
+                    "snippets": serializer.data,
+                    "deleted_ids": batch.deleted_ids,
+                    "next_since": encode_sync_token(batch.upper),
+                    "has_more": batch.has_more,
+                },
+            )
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
 class SnippetCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -58,32 +357,91 @@ class SnippetCreateView(APIView):
                 return ApiResponse.error(message="Snippet creation failed.", errors=serializer.errors)
 
             snippet = serializer.save(created_by=request.user)
-            invalidate_snippet_caches(request.user.pk, snippet.id)
-            invalidate_tag_caches()
+            item = SnippetOverviewSerializer(snippet, context={"request": request}).data
+            write_through_snippet(
+                request.user.pk, (snippet.created_on, snippet.id), item, "insert",
+                detail=serializer.data, detail_message="Snippet retrieved from cache.", updated_on=snippet.updated_on,
+            )
+            invalidate_tag_diff(request.user.pk, serializer.tag_diff)
             return ApiResponse.created(data=serializer.data, message="Snippet created successfully.")
         except Exception as e:
             logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
             return ApiResponse.exception(message="An error occured", errors=str(e))
 
 
+class SnippetImportView(APIView):
+    """
+    Bulk import from an NDJSON body, one ``{"title", "note", "tag_titles"}``
+    object per line.  The body is read line by line and written in chunks, and
+    the caches are invalidated once at the end instead of once per snippet: the
+    user's snippet caches, and the tag caches of the tags the import linked.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            if request.stream is None:
+                return ApiResponse.error(message="Snippet import failed.", errors="Request body is empty.")
+            diffs = []
+            try:
+                result = import_snippets(request.user, request.stream, on_chunk=diffs.append)
+            finally:
+                invalidate_snippet_caches(request.user.pk)
+                invalidate_tag_diff(request.user.pk, TagDiff(
+                    after=frozenset().union(*(diff.after for diff in diffs)),
+                    created=any(diff.created for diff in diffs),
+                ))
+            return ApiResponse.created(data=result, message="Snippets imported successfully.")
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+class SnippetExportView(APIView):
+    """Stream every snippet of the user as NDJSON, in the format the import accepts."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            response = StreamingHttpResponse(export_snippets(request.user), content_type="application/x-ndjson")
+            response["Content-Disposition"] = 'attachment; filename="snippets.ndjson"'
+            return response
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
 class SnippetDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def _get_snippet_and_tag(self, id, user):
         return Snippet.objects.select_related('created_by').prefetch_related('tags').get(id=id, created_by=user)
 
+    def _lock_snippet(self, id, user):
+        """
+        The snippet row locked until the transaction ends and its current tag
+        ids, read under that lock.  Concurrent writes to the same snippet then
+        take turns, and each computes its counter deltas from what the previous
+        one left behind.  Call inside ``transaction.atomic()``.
+        """
+        snippet = Snippet.objects.select_for_update().get(id=id, created_by=user)
+        tag_ids = frozenset(SnippetTag.objects.filter(snippet=snippet).values_list("tag_id", flat=True))
+        return snippet, tag_ids
+
+    def _build_detail(self, request, cache_key, id):
+        snippet = self._get_snippet_and_tag(id, request.user)
+        serializer = SnippetDetailSerializer(snippet, context={"request": request})
+        logger.info(f"Adding in cache key {cache_key}, {serializer.data}")
+        return serializer.data
+
     def get(self, request, id):
         try:
             cache_key = snippet_detail_key(request.user.id,id)
-            cached = cache.get(cache_key)
-            if cached is not None:
-                return ApiResponse.success(data=cached, message="Snippet retrieved from cache.")
-
-            snippet = self._get_snippet_and_tag(id, request.user)
-            serializer = SnippetDetailSerializer(snippet, context={"request": request})
-            logger.info(f"Adding in cache key {cache_key}, {serializer.data}")
-            cache.set(cache_key, serializer.data, timeout=settings.CACHE_TTL_SNIPPET_DETAIL)
-            return ApiResponse.success(data=serializer.data, message="Snippet retrieved successfully.")
+            return cached_or_build(
+                cache_key, lambda: self._build_detail(request, cache_key, id), "snippet_detail",
+                message="Snippet retrieved successfully.", cached_message="Snippet retrieved from cache.",
+                if_none_match=request.headers.get("If-None-Match"),
+            )
         except ObjectDoesNotExist:
             return ApiResponse.not_found(message="Snippet not found.")
         except Exception as e:
@@ -98,8 +456,12 @@ class SnippetDetailView(APIView):
                 return ApiResponse.error(message="Snippet update failed.", errors=serializer.errors)
 
             serializer.save()
-            invalidate_snippet_caches(request.user.pk, snippet_id=id)
-            invalidate_tag_caches()
+            item = SnippetOverviewSerializer(snippet, context={"request": request}).data
+            write_through_snippet(
+                request.user.pk, (snippet.created_on, snippet.id), item, "replace",
+                detail=serializer.data, detail_message="Snippet retrieved from cache.", updated_on=snippet.updated_on,
+            )
+            invalidate_tag_diff(request.user.pk, serializer.tag_diff)
             return ApiResponse.success(data=serializer.data, message="Snippet updated successfully.")
         except ObjectDoesNotExist:
             return ApiResponse.not_found(message="Snippet not found.")
@@ -107,19 +469,39 @@ class SnippetDetailView(APIView):
             logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
             return ApiResponse.exception(message="An error occured", errors=str(e))
 
+    def _remaining_page(self, request, cursor):
+        """First (or ``?cursor=``) overview page of what is left, for ``?include=snippets``."""
+        snippets = overview_rows(Snippet.objects.filter(created_by=request.user))
+        page = paginate_keyset(snippets, cursor, _page_size(request))
+        return {"snippets": overview_data(page.items, request), "next_cursor": page.next_cursor, "prev_cursor": page.prev_cursor}
+
     def delete(self, request, id):
+        """
+        Returns the deleted id and the new total.  The remaining snippets are only
+        listed, one page at a time, when asked for with ``?include=snippets``.
+        """
         try:
-            snippet = self._get_snippet_and_tag(id, request.user)
-            snippet.delete()
-            invalidate_snippet_caches(request.user.pk, snippet_id=id)
-            invalidate_tag_caches()
-
-            remaining = Snippet.objects.filter(created_by=request.user).only("id", "title")
-            serializer = SnippetOverviewSerializer(remaining, many=True, context={"request": request})
-            payload = {
-                "total_snippets_remaining": remaining.count(),
-                "snippets": serializer.data,
-            }
+            include_snippets = request.query_params.get("include") == "snippets"
+            token = request.query_params.get("cursor") or None
+            try:
+                cursor = decode_cursor(token) if include_snippets and token else None
+            except InvalidCursor as e:
+                return ApiResponse.error(message=str(e))
+
+            with transaction.atomic():
+                # A concurrent DELETE of the same snippet waits here, then 404s.
+                snippet, tag_ids = self._lock_snippet(id, request.user)
+                position = (snippet.created_on, snippet.id)
+                TagUsage.objects.adjust(request.user, {tag_id: -1 for tag_id in tag_ids})
+                Profile.objects.adjust_snippet_count(request.user, -1)
+                SnippetTombstone.objects.create(snippet_id=id, user=request.user)
+                snippet.delete()
+            write_through_snippet(request.user.pk, position, {"id": id}, "remove")
+            invalidate_tag_diff(request.user.pk, TagDiff(before=tag_ids))
+
+            payload = {"deleted_id": id, "total_snippets_remaining": snippet_total(request.user)}
+            if include_snippets:
+                payload.update(self._remaining_page(request, cursor))
             return ApiResponse.success(message="Snippet deleted successfully.", data=payload)
         except ObjectDoesNotExist:
             return ApiResponse.not_found(message="Snippet not found.")
@@ -129,52 +511,147 @@ class SnippetDetailView(APIView):
     
 
 class TagListView(APIView):
+    """
+    The requesting user's tags, the ones their snippets carry, with their
+    snippet counts from the ``TagUsage`` counters.  By title, or with
+    ``?sort=popular`` most used first, paginated with ``?page=&page_size=``.
+    """
 
     permission_classes = [IsAuthenticated]
 
+    def _build_page(self, request, cache_key, sort, page, page_size):
+        rows = user_tag_rows(request.user, sort)
+        offset = (page - 1) * page_size
+        items = list(rows[offset:offset + page_size])
+        total = len(items) if page == 1 and len(items) < page_size else rows.count()
+        data = user_tag_payload(items, total, page, page_size)
+        logger.info(f"Adding in cache key {cache_key}, {data}")
+        return data
+
+    def get(self, request):
+        try:
+            sort = "popular" if request.query_params.get("sort") == "popular" else "title"
+            try:
+                page = max(1, int(request.query_params.get("page", 1)))
+            except ValueError:
+                return ApiResponse.error(message="Tag list failed.", errors="page must be an integer.")
+            page_size = _page_size(request)
+
+            cache_key = user_tag_list_key(request.user.pk, sort, page_size, page)
+            return cached_or_build(
+                cache_key, partial(self._build_page, request, cache_key, sort, page, page_size), "tag_list",
+                message="Tags retrieved successfully.", cached_message="Tags retrieved from cache.",
+                if_none_match=request.headers.get("If-None-Match"),
+            )
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+class AllTagListView(APIView):
+    """Every tag in the system, whoever created it.  Admins only."""
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def _build_tags(self, cache_key):
+        tags = Tag.objects.all().order_by("title") #getting tags and count of each snippets in a tag
+        if settings.FAST_READ_SERIALIZATION:
+            data = fast_serializers.tag_items(tags.values(*fast_serializers.TAG_FIELDS))
+        else:
+            data = TagSerializer(tags, many=True).data
+        logger.info(f"Adding in cache key {cache_key}, {data}")
+        return data
+
     def get(self, request):
         try:
             cache_key = tag_list_key()
-            cached = cache.get(cache_key)
-            if cached is not None:
-                return ApiResponse.success(data=cached, message="Tags retrieved from cache.")
-
-            tags = Tag.objects.all().order_by("title") #getting tags and count of each snippets in a tag
-            serializer = TagSerializer(tags, many=True)
-            logger.info(f"Adding in cache key {cache_key}, {serializer.data}")
-            cache.set(cache_key, serializer.data, timeout=settings.CACHE_TTL_TAG_LIST)
-            return ApiResponse.success(data=serializer.data, message="Tags retrieved successfully.")
+            return cached_or_build(
+                cache_key, partial(self._build_tags, cache_key), "tag_list",
+                message="Tags retrieved successfully.", cached_message="Tags retrieved from cache.",
+                if_none_match=request.headers.get("If-None-Match"),
+            )
         except Exception as e:
             logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
             return ApiResponse.exception(message="An error occured", errors=str(e))
-        
+
+
+class TagSuggestView(APIView):
+    """
+    Autocomplete: up to ``?limit=`` of the requesting user's tags whose title
+    starts with ``?q=``, by title or with ``?sort=popular`` most used first.
+    Admins are suggested every tag, their own first for ``popular``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            try:
+                limit = int(request.query_params.get("limit", settings.TAG_SUGGEST_LIMIT))
+            except ValueError:
+                limit = settings.TAG_SUGGEST_LIMIT
+            limit = max(1, min(limit, settings.TAG_SUGGEST_MAX_LIMIT))
+            sort = "popular" if request.query_params.get("sort") == "popular" else "title"
+            all_tags = IsAdminUser().has_permission(request, self)  # like tags/all/
+            data = suggest_tags(
+                normalize_prefix(request.query_params.get("q", "")), limit, request.user, sort=sort, all_tags=all_tags
+            )
+            return ApiResponse.success(data=data, message="Tag suggestions retrieved successfully.")
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+def tag_detail_message(data):
+    return f"Snippets associaed to Tag '{data.get('title').title()}' retrieved successfully."
+
 
 class TagDetailView(APIView):
+    """
+    A tag and one page of the requesting user's snippets under it, newest first,
+    paginated with ``?cursor=`` / ``?page_size=`` like the overview.
+    """
 
     permission_classes = [IsAuthenticated]
 
+    def _build_detail(self, request, cache_key, id, cursor, page_size):
+        tag = get_object_or_404(tag_rows(), pk=id)
+        links = SnippetTag.objects.filter(tag_id=id, created_by=request.user)
+        page = paginate_keyset(tag_snippet_rows(links), cursor, page_size, id_field="snippet_id")
+        data = tag_detail_payload(tag, page, request)
+        logger.info(f"Adding in cache key {cache_key}, {data}")
+        return data
+
     def get(self, request, id):
         try:
-            cache_key = tag_detail_key(id, request.user.id)
-            cached = cache.get(cache_key)
-            if cached is not None:
-                return ApiResponse.success(data=cached, message=f"Snippets associaed to Tag '{cached.get('title').title()}' retrieved successfully.")
-
-            tag = get_object_or_404(
-                Tag.objects.prefetch_related(  #writing this logic inside the get object or 404 because serilizer expect tag object
-                    Prefetch(
-                        "snippets",
-                        queryset=Snippet.objects.filter(created_by=request.user)
-                    )
-                ),
-                pk=id
+            token = request.query_params.get("cursor") or None
+            page_size = _page_size(request)
+            try:
+                cursor = decode_cursor(token) if token else None
+            except InvalidCursor as e:
+                return ApiResponse.error(message=str(e))
+
+            cache_key = tag_detail_key(id, request.user.id, page_size, token)
+            return cached_or_build(
+                cache_key, partial(self._build_detail, request, cache_key, id, cursor, page_size), "tag_detail",
+                message=tag_detail_message, cached_message=tag_detail_message,
+                if_none_match=request.headers.get("If-None-Match"),
             )
-            serializer = TagDetailSerializer(tag, context={"request": request})
-            logger.info(f"Adding in cache key {cache_key}, {serializer.data}")
-            cache.set(cache_key, serializer.data, timeout=settings.CACHE_TTL_TAG_DETAIL)
-            return ApiResponse.success(data=serializer.data, message=f"Snippets associaed to Tag '{serializer.data.get('title').title()}' retrieved successfully.")
         except Http404:
             return ApiResponse.not_found(message="Tag not found.")
         except Exception as e:
             logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
-            return ApiResponse.exception(message="An error occured", errors=str(e))
\ No newline at end of file
+            return ApiResponse.exception(message="An error occured", errors=str(e))
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of this worker's local tier and of Redis behind it."""
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        try:
+            return ApiResponse.success(data=tiered_cache.stats, message="Cache stats retrieved successfully.")
+        except Exception as e:
+            logger.exception(f" {str(e)} | {str(traceback.format_exc())} ")
+            return ApiResponse.exception(message="An error occured", errors=str(e))
@@ -1,42 +1,373 @@
+import hashlib
+import json
 import logging
+import time
+from functools import partial
+from django.conf import settings
 from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
+
+from snippets.pagination import position_in_bounds
+from utils.response_cache import patch_cached, store_entry_unless_newer
+from utils.tiered_cache import get_redis_client, tiered_cache
 
 
 logger = logging.getLogger(__name__)
 
 
-def snippet_list_key(user_id: int) -> str:
-    return f"snippets:list:user:{user_id}"
+TAG_SCOPE = "tags"
+TAG_SUGGEST_SCOPE = "tags:suggest"  # the in-process prefix index of snippets/suggest.py
+
+
+def generation_key(scope: str) -> str:
+    return f"gen:{scope}"
+
+
+def _generation_ttl() -> int:
+    # As long as the longest-lived entry a generation can version.  Without it a
+    # counter per (tag, user) would stay in Redis forever; an expired one is
+    # reseeded from the clock like a lost one, which only costs rebuilds.
+    return max(hard for _, hard in settings.CACHE_TTLS.values())
+
+
+def get_generation(scope: str) -> int:
+    """
+    Current generation of a key family. Versioned keys embed it, so bumping the
+    generation orphans every old entry at once and they age out on their TTLs.
+    """
+    key = generation_key(scope)
+    generation = tiered_cache.get(key)
+    if generation is None:
+        # Seeded from the clock so a counter lost to eviction or a Redis restart
+        # never comes back at a value that still has live entries behind it.
+        cache.add(key, int(time.time() * 1000), timeout=_generation_ttl())
+        generation = tiered_cache.get(key, 0)
+    return generation
+
+
+async def aget_generation(scope: str) -> int:
+    """``get_generation`` for async views, through the async cache API."""
+    key = generation_key(scope)
+    generation = await tiered_cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, int(time.time() * 1000), timeout=_generation_ttl())
+        generation = await tiered_cache.aget(key, 0)
+    return generation
+
+
+def bump_generation(scope: str) -> None:
+    key = generation_key(scope)
+    try:
+        cache.incr(key)
+        cache.touch(key, _generation_ttl())  # INCR keeps the old expiry
+    except ValueError:  # counter not seeded yet, nothing versioned under it is cached
+        cache.add(key, int(time.time() * 1000), timeout=_generation_ttl())
+    tiered_cache.evict([key])
+
+
+def snippet_list_scope(user_id: int) -> str:
+    return f"snippets:user:{user_id}"
+
+
+# Versioned key builders take an optional ``generation`` so async callers can
+# resolve it with ``aget_generation`` instead of a blocking cache read.
+
+def snippet_list_key(user_id: int, generation: int | None = None) -> str:
+    if generation is None:
+        generation = get_generation(snippet_list_scope(user_id))
+    return f"snippets:list:user:{user_id}:g{generation}"
+
+
+def snippet_page_key(user_id: int, page_size: int, cursor: str | None = None, generation: int | None = None) -> str:
+    return f"{snippet_list_key(user_id, generation)}:page:{page_size}:{cursor or 'first'}"
+
+
+def snippet_page_index_key(user_id: int) -> str:
+    return f"{snippet_list_key(user_id)}:pages"
+
+
+def snippet_count_key(user_id: int) -> str:
+    return f"snippets:count:user:{user_id}"
+
+
+def snippet_count_ttl() -> int:
+    # Read with every cached overview page, 304s included, so it lives as long as they do.
+    return settings.CACHE_TTLS["snippet_list"][1]
+
+
+def store_snippet_count(user_id: int, total: int) -> None:
+    """
+    Cache a count read from the database or a page, unless one is cached
+    already.  Writes delete the key, so ``add`` never overwrites a count
+    cached after a write with one read before it.
+    """
+    cache.add(snippet_count_key(user_id), total, timeout=snippet_count_ttl())
+
+
+async def astore_snippet_count(user_id: int, total: int) -> None:
+    await cache.aadd(snippet_count_key(user_id), total, timeout=snippet_count_ttl())
 
 
 def snippet_detail_key(user_id: int, snippet_id: int) -> str:
     return f"snippets:detail:user:{user_id}:{snippet_id}"
 
 
-def tag_list_key() -> str:
-    return "tags:list"
+def _snippet_search_scope(user_id: int) -> str:
+    return f"snippets:search:user:{user_id}"
+
+
+def snippet_search_key(user_id: int, query: str, page: int, page_size: int) -> str:
+    digest = hashlib.sha1(query.encode()).hexdigest()
+    generation = get_generation(_snippet_search_scope(user_id))
+    return f"snippets:search:user:{user_id}:g{generation}:{digest}:{page_size}:{page}"
+
+
+def snippet_filter_scope(user_id: int) -> str:
+    return f"snippets:filter:user:{user_id}"
+
+
+def snippet_filter_key(user_id: int, titles: list, mode: str, page_size: int, cursor: str | None = None, generation: int | None = None) -> str:
+    """One page of the overview filtered by tags, ``titles`` normalised and sorted."""
+    if generation is None:
+        generation = get_generation(snippet_filter_scope(user_id))
+    digest = hashlib.sha1(",".join(titles).encode()).hexdigest()
+    return f"snippets:filter:user:{user_id}:g{generation}:{mode}:{digest}:page:{page_size}:{cursor or 'first'}"
+
 
+def tag_list_key(generation: int | None = None) -> str:
+    return f"tags:list:g{get_generation(TAG_SCOPE) if generation is None else generation}"
 
-def tag_detail_key(tag_id: int, user_id: int) -> str:
-    return f"tags:detail:{tag_id}:{user_id}"
 
+def user_tag_scope(user_id: int) -> str:
+    return f"tags:user:{user_id}"
 
-def invalidate_snippet_caches(user_id: int, snippet_id: int | None = None) -> None:
-    keys = [snippet_list_key(user_id)]
+
+def user_tag_list_key(user_id: int, sort: str, page_size: int, page: int, generation: tuple | None = None) -> str:
+    """
+    One page of a user's tag list in ``sort`` order.  ``generation`` pairs the
+    ``tags`` generation with the user's own, which their snippet writes bump.
+    """
+    if generation is None:
+        generation = (get_generation(TAG_SCOPE), get_generation(user_tag_scope(user_id)))
+    return f"tags:user:{user_id}:g{generation[0]}.{generation[1]}:{sort}:page:{page_size}:{page}"
+
+
+async def auser_tag_generation(user_id: int) -> tuple:
+    return await aget_generation(TAG_SCOPE), await aget_generation(user_tag_scope(user_id))
+
+
+def tag_detail_scope(tag_id: int, user_id: int) -> str:
+    return f"tags:detail:{tag_id}:user:{user_id}"
+
+
+def tag_detail_key(tag_id: int, user_id: int, page_size: int | None = None, cursor: str | None = None, generation: tuple | None = None) -> str:
+    """
+    One page of a user's snippets under a tag.  ``generation`` is the pair of
+    the ``tags`` generation, which drops every tag detail at once, and the
+    tag's per-user one, which drops only this user's pages of this tag.
+    """
+    if generation is None:
+        generation = (get_generation(TAG_SCOPE), get_generation(tag_detail_scope(tag_id, user_id)))
+    page_size = page_size or settings.SNIPPET_PAGE_SIZE
+    return f"tags:detail:{tag_id}:{user_id}:g{generation[0]}.{generation[1]}:page:{page_size}:{cursor or 'first'}"
+
+
+async def atag_detail_generation(tag_id: int, user_id: int) -> tuple:
+    return await aget_generation(TAG_SCOPE), await aget_generation(tag_detail_scope(tag_id, user_id))
+
+
+def _page_index_ttl() -> int:
+    # Pages are served (stale) until their hard TTL, a write must still find them.
+    return settings.CACHE_TTLS["snippet_list"][1]
+
+
+def register_snippet_page(user_id: int, page_key: str, bounds: dict) -> None:
+    """
+    Remember which ``(created_on, id)`` range a cached overview page covers so a
+    write only has to touch the pages it actually lands in.  ``bounds`` may also
+    carry the page ``size``, which is needed to insert into the page in place.
+    """
+    index_key = snippet_page_index_key(user_id)
+    client = get_redis_client()
+    if client is not None:
+        try:
+            raw_key = cache.make_key(index_key)
+            pipe = client.pipeline()
+            pipe.hset(raw_key, page_key, json.dumps(bounds))
+            pipe.expire(raw_key, _page_index_ttl())
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not register page {page_key}: {e}")
+        return
+    index = cache.get(index_key) or {}
+    index[page_key] = bounds
+    cache.set(index_key, index, timeout=_page_index_ttl())
+
+
+def _snippet_page_index(user_id: int) -> dict:
+    index_key = snippet_page_index_key(user_id)
+    client = get_redis_client()
+    if client is not None:
+        try:
+            raw = client.hgetall(cache.make_key(index_key))
+        except Exception as e:
+            logger.warning(f"Could not read page index {index_key}: {e}")
+            return {}
+        return {key.decode(): json.loads(value) for key, value in raw.items()}
+    return cache.get(index_key) or {}
+
+
+def _forget_snippet_pages(user_id: int, page_keys: list) -> None:
+    index_key = snippet_page_index_key(user_id)
+    client = get_redis_client()
+    if client is not None:
+        try:
+            client.hdel(cache.make_key(index_key), *page_keys)
+        except Exception as e:
+            logger.warning(f"Could not update page index {index_key}: {e}")
+        return
+    index = cache.get(index_key) or {}
+    for page_key in page_keys:
+        index.pop(page_key, None)
+    cache.set(index_key, index, timeout=_page_index_ttl())
+
+
+def invalidate_snippet_caches(user_id: int, snippet_id: int | None = None, position: tuple | None = None) -> None:
+    """
+    ``position`` is the ``(created_on, id)`` of the written snippet. When given,
+    only the overview pages whose range contains it are dropped; otherwise the
+    user's list generation is bumped and every cached page is orphaned.
+    """
+    keys = [snippet_count_key(user_id)]
     if snippet_id is not None:
         keys.append(snippet_detail_key(user_id, snippet_id))
+    bump_generation(_snippet_search_scope(user_id))  # any write can change any result ranking
+    bump_generation(snippet_filter_scope(user_id))
+
+    if position is None:
+        bump_generation(snippet_list_scope(user_id))
+    else:
+        index = _snippet_page_index(user_id)
+        pages = [page_key for page_key, bounds in index.items() if position_in_bounds(position, bounds)]
+        if pages:
+            keys.extend(pages)
+            _forget_snippet_pages(user_id, pages)
     logger.info(f"Deleting key {keys}")
-    cache.delete_many(keys)
+    tiered_cache.delete_many(keys)
 
 
-def invalidate_tag_caches(tag_id: int | None = None, user_id: int | None = None) -> None:
-    keys = [tag_list_key()]
-    if tag_id is not None and user_id is not None: # user and tag specific key is deleted
-        keys.append(tag_detail_key(tag_id, user_id))
-    logger.info(f"Deleting key {keys}")
-    cache.delete_many(keys)
-    pattern = "tags:detail:*"
-    if hasattr(cache, "iter_keys"): #delete all keys starts with pattern
-        for key in cache.iter_keys(pattern):
-            logger.info(f"Deleting key {key}")
-            cache.delete(key)
\ No newline at end of file
+def _as_datetime(value):
+    """Cached payloads hold timestamps as rendered strings or, unrendered, as datetimes."""
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+def _newer_than(updated_on):
+    """Whether a cached snippet (detail or overview row) was written after ``updated_on``, assumed when unknown."""
+    def is_newer(cached) -> bool:
+        cached_on = _as_datetime(cached.get("updated_on"))
+        return cached_on is None or updated_on is None or cached_on > updated_on
+    return is_newer
+
+
+def _row_position(row):
+    """``(created_on, id)`` of a cached overview row, ``None`` for rows cached without it."""
+    created_on = _as_datetime(row.get("created_on"))
+    return None if created_on is None else (created_on, row["id"])
+
+
+def _patch_page(op: str, item: dict, size, position: tuple, is_newer, payload: dict):
+    """
+    One overview page payload with ``item`` inserted at its ``position``,
+    replaced or removed, ``None`` when that cannot be done without re-reading
+    the database.  Concurrent writers may patch in any order: an insert lands
+    where ``(created_on, id)`` puts it, and a replace over a row that
+    ``is_newer`` drops the page.
+    """
+    snippets = list(payload["snippets"])
+    index = next((i for i, snippet in enumerate(snippets) if snippet["id"] == item["id"]), None)
+    if op == "insert":
+        if index is not None:  # the page was rebuilt after the insert committed
+            return payload
+        # A full page would have to push its last row (and its next cursor) out.
+        if size is None or len(snippets) >= size:
+            return None
+        positions = [_row_position(snippet) for snippet in snippets]
+        if None in positions:
+            return None
+        # Newest first: before the first row older than the new one.
+        index = next((i for i, row_position in enumerate(positions) if row_position < position), len(snippets))
+        snippets.insert(index, item)
+    elif index is None:
+        return None
+    elif op == "replace":
+        if is_newer(snippets[index]):
+            return None
+        snippets[index] = item
+    else:
+        del snippets[index]
+    return {**payload, "snippets": snippets}
+
+
+def write_through_snippet(user_id: int, position: tuple, item: dict, op: str, detail=None, detail_message=None, updated_on=None) -> None:
+    """
+    Update the caches for one created (``op="insert"``), updated (``"replace"``)
+    or deleted (``"remove"``) snippet instead of dropping them.  ``item`` is its
+    overview representation and ``position`` its ``(created_on, id)``.  The
+    detail key is set from ``detail`` (removed when ``None``) unless it already
+    holds a version newer than the snippet's ``updated_on``, in which case it is
+    removed, and the overview pages the snippet falls in are patched atomically,
+    under the same ``updated_on`` check.
+    """
+    detail_key = snippet_detail_key(user_id, item["id"])
+    if detail is None:
+        tiered_cache.delete_many([detail_key])
+    else:
+        store_entry_unless_newer(detail_key, detail, "snippet_detail", detail_message, _newer_than(updated_on))
+
+    if op != "replace":
+        # Dropped rather than adjusted: an INCR of a missing key does nothing,
+        # and a reader could then cache the count it read before the write.
+        tiered_cache.delete_many([snippet_count_key(user_id)])
+    bump_generation(_snippet_search_scope(user_id))
+    bump_generation(snippet_filter_scope(user_id))
+
+    dropped = []
+    for page_key, bounds in _snippet_page_index(user_id).items():
+        if not position_in_bounds(position, bounds):
+            continue
+        patch = partial(_patch_page, op, item, bounds.get("size"), position, _newer_than(updated_on))
+        if not patch_cached(page_key, patch, "snippet_list"):
+            dropped.append(page_key)
+    if dropped:
+        _forget_snippet_pages(user_id, dropped)
+    logger.info(f"Write-through {op} of snippet {item['id']}, dropped pages {dropped}")
+
+
+def invalidate_all_tag_caches() -> None:
+    """
+    Drop every user's tag lists and tag details, and the suggest indexes, with
+    an INCR of the ``tags`` generation instead of scanning the keyspace for
+    ``tags:detail:*``.  Snippet writes use ``invalidate_tag_diff`` instead.
+    """
+    logger.info("Bumping tag cache generation")
+    bump_generation(TAG_SCOPE)
+    bump_generation(TAG_SUGGEST_SCOPE)
+
+
+def invalidate_tag_diff(user_id: int, diff) -> None:
+    """
+    Drop only the tag caches a snippet write made stale, from its ``TagDiff``:
+    the user's detail pages of each tag whose snippet list changed (a bump of
+    that tag's per-user generation), every page of their tag list when their
+    tag counts changed, and the global list and the suggest index when new tags
+    were created.  Every other user's and every other tag's entries stay cached.
+    """
+    for tag_id in sorted(diff.detail_tag_ids):
+        bump_generation(tag_detail_scope(tag_id, user_id))
+    if diff.usage_changed:
+        bump_generation(user_tag_scope(user_id))
+    if diff.created:
+        keys = [tag_list_key()]
+        logger.info(f"Deleting key {keys}")
+        tiered_cache.delete_many(keys)
+        bump_generation(TAG_SUGGEST_SCOPE)
@@ -1,6 +1,56 @@
+import json
+
+from django.http import HttpResponseNotModified
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 
+from utils.renderers import FastJSONRenderer
+
+_renderer = FastJSONRenderer()
+
+
+def render_json(data) -> bytes:
+    """Render ``data`` exactly as the API's JSON renderer would for a response."""
+    return _renderer.render(data)
+
+
+class RenderedResponse(Response):
+    """
+    ``Response`` whose JSON body is already rendered.  When content negotiation
+    picks compact JSON the bytes are sent as they are; any other representation
+    (the browsable API, ``Accept: application/json; indent=2``) renders ``data``
+    like a plain ``Response`` would, so a warm cache never changes the answer.
+    ``data`` is decoded lazily, only when something asks for it.
+    """
+
+    _rendered = None
+
+    def __init__(self, content, status=status.HTTP_200_OK):
+        super().__init__(status=status)
+        self._rendered = content
+
+    @property
+    def data(self):
+        if self._data is None and self._rendered is not None:
+            self._data = json.loads(self._rendered)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        renderer = self.accepted_renderer
+        compact = isinstance(renderer, JSONRenderer) and not renderer.get_indent(
+            self.accepted_media_type, self.renderer_context or {}
+        )
+        if compact:
+            self["Content-Type"] = self.content_type or renderer.media_type
+            return self._rendered
+        return super().rendered_content
+
 
 class ApiResponse:
     """
@@ -36,6 +86,27 @@ class ApiResponse:
         }
         return Response(payload, status=status_code)
 
+    @classmethod
+    def success_rendered(cls, data_bytes, message="Request was successful.", status_code=status.HTTP_200_OK):
+        """
+        Success envelope around ``data_bytes`` that were already rendered with
+        ``render_json``.  The envelope is built by concatenation, so the body is
+        byte-identical to ``success()`` without encoding ``data`` again.
+        """
+        body = b"".join([
+            b'{"success":true,"message":', render_json(message),
+            b',"data":', data_bytes,
+            b',"status_code":', str(status_code).encode(), b"}",
+        ])
+        return RenderedResponse(body, status=status_code)
+
+    @classmethod
+    def not_modified(cls, etag):
+        """Bodiless 304 for a conditional GET whose ``If-None-Match`` matched ``etag``."""
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
     @classmethod
     def created(cls, data=None, message="Resource created successfully."):
         return cls.success(data=data, message=message, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,36 @@
+try:
+    import orjson
+except ImportError:  # optional dependency, DRF's stdlib json renderer is used without it
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when it is installed, falling back
+    to DRF's stdlib ``json`` rendering otherwise.
+
+    The output is byte-identical to ``JSONRenderer``: datetimes, decimals, lazy
+    strings and the like are passed to DRF's own encoder (orjson's native
+    datetime format differs from DRF's), and U+2028/U+2029 are escaped the same
+    way.  Indented output (e.g. ``Accept: application/json; indent=4``) and
+    anything orjson cannot encode, such as integers beyond 64 bits, also go
+    through the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Valid JSON but not valid JavaScript, so JSONRenderer escapes them.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,447 @@
+"""
+Caching of read responses.
+
+With ``CACHE_RENDERED_RESPONSES`` on, an entry holds the JSON bytes of the
+response data as DRF would render them, so a hit is served without unpickling
+a structure, building dicts or encoding JSON.  The ``ApiResponse`` envelope is
+concatenated around those bytes, which is why the "from cache" message (or any
+other message) never forces a re-render.  With it off, entries hold the
+serialized data and go through ``ApiResponse.success`` as before.
+
+Misses are rebuilt single-flight: the first worker takes a short lock in the
+shared cache and rebuilds, the others wait for its result.  Entries also record
+how long they took to build and are refreshed early, with a probability that
+grows as expiry approaches and with the build cost (the "XFetch" scheme), so hot
+keys rarely expire under load.
+
+Every key family has a soft and a hard TTL (``CACHE_TTLS``).  Entries live in
+Redis until the hard TTL; past the soft one they are stale and are still served
+as is while one worker rebuilds them in the background.  Writes delete keys or
+bump generations, so a stale entry is only ever older by time, not by a write.
+
+Each entry also stores a digest of its data, from which responses get a weak
+``ETag``.  A request whose ``If-None-Match`` matches is answered with a 304
+straight from the entry, without a database query or any serialization.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils.http import parse_etags
+
+from utils.custom_response import ApiResponse, render_json
+from utils.tiered_cache import get_redis_client, tiered_cache
+
+logger = logging.getLogger(__name__)
+
+# ``message`` is what a cache hit answers with, ``expires_at`` is the unix
+# timestamp of the soft expiry, ``delta`` the seconds it took to build the entry
+# and ``etag`` the digest of the rendered data (``None`` for entries cached
+# before it was added).
+RenderedEntry = namedtuple("RenderedEntry", ["body", "message", "expires_at", "delta", "etag"], defaults=[None])
+DataEntry = namedtuple("DataEntry", ["data", "message", "expires_at", "delta", "etag"], defaults=[None])
+
+
+def _merge_rendered(extra, body: bytes) -> bytes:
+    """Prepend the ``extra`` fields to an already rendered JSON object."""
+    if not extra:
+        return body
+    head = render_json(extra)
+    return head[:-1] + b"," + body[1:] if body != b"{}" else head
+
+
+def _message(message, data):
+    """Messages may depend on the payload (e.g. the tag title), pass a callable for those."""
+    return message(data) if callable(message) else message
+
+
+def _is_entry(value) -> bool:
+    # Values cached before this module existed are plain data; treat them as misses.
+    return isinstance(value, (RenderedEntry, DataEntry))
+
+
+def _digest(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()
+
+
+def make_entry(data, cached_message, timeout, delta=0.0):
+    expires_at = time.time() + timeout
+    body = render_json(data)
+    if settings.CACHE_RENDERED_RESPONSES:
+        return RenderedEntry(body, cached_message, expires_at, delta, _digest(body))
+    return DataEntry(data, cached_message, expires_at, delta, _digest(body))
+
+
+def entry_etag(entry, extra=None):
+    """
+    Weak ``ETag`` of the response data for ``entry`` with ``extra`` merged in.
+    Weak because the envelope's message differs between a build and a hit.
+    """
+    if entry.etag is None:
+        return None
+    digest = _digest(entry.etag.encode() + render_json(extra)) if extra else entry.etag
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, etag) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header value."""
+    if not if_none_match or etag is None:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in etags}
+
+
+def entry_response(entry, message=None, extra=None, if_none_match=None):
+    """
+    Build the success response for a cache entry, using its stored message unless
+    one is given.  ``extra`` may be a callable, evaluated only once the entry is
+    in hand (after a rebuild, say).  The response carries the entry's ``ETag``,
+    and is a bodiless 304 when ``if_none_match`` matches it.
+    """
+    message = entry.message if message is None else message
+    extra = extra() if callable(extra) else extra
+    etag = entry_etag(entry, extra)
+    if etag_matches(if_none_match, etag):
+        return ApiResponse.not_modified(etag)
+    if isinstance(entry, RenderedEntry):
+        response = ApiResponse.success_rendered(_merge_rendered(extra, entry.body), message=message)
+    else:
+        data = {**extra, **entry.data} if extra else entry.data
+        response = ApiResponse.success(data=data, message=message)
+    if etag is not None:
+        response["ETag"] = etag
+    return response
+
+
+def _ttls(family):
+    """``(soft, hard)`` TTLs of a key family."""
+    return settings.CACHE_TTLS[family]
+
+
+def is_stale(entry) -> bool:
+    return time.time() >= entry.expires_at
+
+
+def should_refresh_early(entry) -> bool:
+    beta = settings.CACHE_STAMPEDE["EARLY_REFRESH_BETA"]
+    if not beta or not entry.delta:
+        return False
+    # -log(u) is exponentially distributed, 1 - random() keeps u in (0, 1].
+    return time.time() - entry.delta * beta * math.log(1.0 - random.random()) >= entry.expires_at
+
+
+def _lock_key(cache_key: str) -> str:
+    return f"lock:{cache_key}"
+
+
+def _acquire(cache_key):
+    """Take the rebuild lock for ``cache_key``, returning its token or ``None`` if someone holds it."""
+    token = uuid.uuid4().hex
+    if cache.add(_lock_key(cache_key), token, timeout=settings.CACHE_STAMPEDE["LOCK_TTL"]):
+        return token
+    return None
+
+
+def _release(cache_key, token) -> None:
+    # Only the holder releases; an expired lock may already belong to someone else.
+    if cache.get(_lock_key(cache_key)) == token:
+        cache.delete(_lock_key(cache_key))
+
+
+def _wait_for(cache_key):
+    """Poll for the entry the lock holder is building, ``None`` if it does not show up in time."""
+    options = settings.CACHE_STAMPEDE
+    deadline = time.monotonic() + options["LOCK_WAIT"]
+    while time.monotonic() < deadline:
+        time.sleep(options["POLL_INTERVAL"])
+        entry = cache.get(cache_key)
+        if _is_entry(entry):
+            return entry
+    return None
+
+
+def _build_entry(cache_key, build, family, cached_message):
+    soft, hard = _ttls(family)
+    started = time.monotonic()
+    data = build()
+    entry = make_entry(data, _message(cached_message, data), soft, delta=time.monotonic() - started)
+    tiered_cache.set(cache_key, entry, timeout=hard)
+    return data, entry
+
+
+def _build_and_store(cache_key, build, family, message, cached_message, extra, if_none_match):
+    data, entry = _build_entry(cache_key, build, family, cached_message)
+    return entry_response(entry, message=_message(message, data), extra=extra, if_none_match=if_none_match)
+
+
+_executor = None
+
+
+def _refresh_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh"
+        )
+    return _executor
+
+
+def _refresh(cache_key, build, family, cached_message, token):
+    # Pool threads keep their own DB connection; treat each task like a request.
+    close_old_connections()
+    try:
+        current = cache.get(cache_key)
+        if _is_entry(current) and not is_stale(current):
+            # Another worker refreshed it already, only our local copy is behind.
+            tiered_cache.forget_local([cache_key])
+            return
+        _build_entry(cache_key, build, family, cached_message)
+        tiered_cache.evict([cache_key])
+    except Exception as e:
+        logger.warning(f"Background refresh of cache key {cache_key} failed: {e}")
+    finally:
+        _release(cache_key, token)
+        close_old_connections()
+
+
+def _schedule_refresh(cache_key, build, family, cached_message) -> None:
+    token = _acquire(cache_key)
+    if token is None:
+        return  # someone is already rebuilding it
+    _refresh_executor().submit(_refresh, cache_key, build, family, cached_message, token)
+
+
+def cached_or_build(cache_key, build, family, message, cached_message, extra=None, if_none_match=None):
+    """
+    Response for ``cache_key``, calling ``build()`` for the data on a miss.
+    Stale entries, and fresh ones picked for early refresh, are served as they are
+    and rebuilt in the background.  ``family`` names the ``CACHE_TTLS`` pair to
+    use, ``extra`` fields are added to the data but not cached.  Pass the
+    request's ``If-None-Match`` header as ``if_none_match`` to answer 304s.
+    """
+    entry = tiered_cache.get(cache_key)
+    if _is_entry(entry):
+        if is_stale(entry) or should_refresh_early(entry):
+            _schedule_refresh(cache_key, build, family, cached_message)
+        return entry_response(entry, extra=extra, if_none_match=if_none_match)
+
+    token = _acquire(cache_key)
+    if token is None:
+        entry = _wait_for(cache_key)
+        if entry is not None:
+            return entry_response(entry, extra=extra, if_none_match=if_none_match)
+        # The holder is slow or died, answer this request without the lock.
+        return _build_and_store(cache_key, build, family, message, cached_message, extra, if_none_match)
+    try:
+        # Whoever held the lock before us may have just stored it.
+        fresh = cache.get(cache_key)
+        if _is_entry(fresh):
+            return entry_response(fresh, extra=extra, if_none_match=if_none_match)
+        return _build_and_store(cache_key, build, family, message, cached_message, extra, if_none_match)
+    finally:
+        _release(cache_key, token)
+
+
+def store_entry(cache_key, data, family, cached_message) -> None:
+    """Write-through: cache ``data`` the way a read of ``cache_key`` would have."""
+    soft, hard = _ttls(family)
+    tiered_cache.set(cache_key, make_entry(data, cached_message, soft), timeout=hard)
+
+
+def store_entry_unless_newer(cache_key, data, family, cached_message, is_newer) -> bool:
+    """
+    ``store_entry`` for writes that can reach the cache out of commit order:
+    ``data`` is only cached over an entry whose data ``is_newer(cached)`` is
+    false.  An empty key is filled with ``cache.add``; an existing entry is
+    replaced with ``patch_cached``, which deletes the key instead when the
+    cached data is newer.  Returns ``False`` if the key was deleted.
+    """
+    soft, hard = _ttls(family)
+    if cache.add(cache_key, make_entry(data, cached_message, soft), timeout=hard):
+        tiered_cache.evict([cache_key])
+        return True
+    return patch_cached(cache_key, lambda cached: None if is_newer(cached) else data, family)
+
+
+def patch_entry(entry, patch):
+    """
+    ``entry`` with ``patch(data)`` applied to its data, ``None`` if ``patch``
+    returns ``None`` because the change cannot be applied in place.
+    """
+    data = json.loads(entry.body) if isinstance(entry, RenderedEntry) else entry.data
+    data = patch(data)
+    if data is None:
+        return None
+    body = render_json(data)
+    if isinstance(entry, RenderedEntry):
+        return entry._replace(body=body, etag=_digest(body))
+    return entry._replace(data=data, etag=_digest(body))
+
+
+def patch_cached(cache_key, patch, family, retries=3) -> bool:
+    """
+    Apply ``patch`` to the entry at ``cache_key`` without losing a concurrent
+    writer's change.  On Redis this is a WATCH/MULTI transaction that is retried
+    when the key changes underneath it and keeps the key's remaining TTL; other
+    backends patch under the rebuild lock.  The entry is deleted whenever it
+    cannot be patched.  Returns ``False`` if it was deleted.
+    """
+    client = get_redis_client()
+    try:
+        if client is not None:
+            return _patch_redis(client, cache_key, patch, retries)
+        return _patch_locked(cache_key, patch, family)
+    finally:
+        tiered_cache.evict([cache_key])
+
+
+def _patch_redis(client, cache_key, patch, retries) -> bool:
+    from redis.exceptions import WatchError
+
+    raw_key = cache.make_key(cache_key)
+    for _ in range(retries):
+        try:
+            with client.pipeline() as pipe:
+                pipe.watch(raw_key)
+                raw = pipe.get(raw_key)
+                if raw is None:
+                    return True  # nothing cached, the next read builds it
+                entry = cache.client.decode(raw)
+                patched = patch_entry(entry, patch) if _is_entry(entry) else None
+                ttl = pipe.pttl(raw_key)
+                pipe.multi()
+                if patched is None:
+                    pipe.delete(raw_key)
+                else:
+                    pipe.set(raw_key, cache.client.encode(patched), px=ttl if ttl > 0 else None)
+                pipe.execute()
+                return patched is not None
+        except WatchError:
+            continue
+    cache.delete(cache_key)
+    return False
+
+
+def _patch_locked(cache_key, patch, family) -> bool:
+    token = _acquire(cache_key)
+    if token is None:
+        cache.delete(cache_key)  # being rebuilt or patched by someone else
+        return False
+    try:
+        entry = cache.get(cache_key)
+        if entry is None:
+            return True
+        patched = patch_entry(entry, patch) if _is_entry(entry) else None
+        if patched is None:
+            cache.delete(cache_key)
+            return False
+        cache.set(cache_key, patched, timeout=_ttls(family)[1])
+        return True
+    finally:
+        _release(cache_key, token)
+
+
+async def _aacquire(cache_key):
+    token = uuid.uuid4().hex
+    if await cache.aadd(_lock_key(cache_key), token, timeout=settings.CACHE_STAMPEDE["LOCK_TTL"]):
+        return token
+    return None
+
+
+async def _arelease(cache_key, token) -> None:
+    if await cache.aget(_lock_key(cache_key)) == token:
+        await cache.adelete(_lock_key(cache_key))
+
+
+async def _await_for(cache_key):
+    options = settings.CACHE_STAMPEDE
+    deadline = time.monotonic() + options["LOCK_WAIT"]
+    while time.monotonic() < deadline:
+        await asyncio.sleep(options["POLL_INTERVAL"])
+        entry = await cache.aget(cache_key)
+        if _is_entry(entry):
+            return entry
+    return None
+
+
+async def _abuild_entry(cache_key, build, family, cached_message):
+    soft, hard = _ttls(family)
+    started = time.monotonic()
+    data = await build()
+    entry = make_entry(data, _message(cached_message, data), soft, delta=time.monotonic() - started)
+    await tiered_cache.aset(cache_key, entry, timeout=hard)
+    return data, entry
+
+
+# Strong references to running refresh tasks, the event loop only keeps weak ones.
+_refresh_tasks = set()
+
+
+async def _arefresh(cache_key, build, family, cached_message, token):
+    try:
+        current = await cache.aget(cache_key)
+        if _is_entry(current) and not is_stale(current):
+            tiered_cache.forget_local([cache_key])
+            return
+        await _abuild_entry(cache_key, build, family, cached_message)
+        await sync_to_async(tiered_cache.evict)([cache_key])  # publishes to Redis
+    except Exception as e:
+        logger.warning(f"Background refresh of cache key {cache_key} failed: {e}")
+    finally:
+        await _arelease(cache_key, token)
+
+
+async def _aschedule_refresh(cache_key, build, family, cached_message) -> None:
+    token = await _aacquire(cache_key)
+    if token is None:
+        return
+    task = asyncio.get_running_loop().create_task(_arefresh(cache_key, build, family, cached_message, token))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _aentry(cache_key, build, family, message, cached_message):
+    """The entry for ``cache_key`` and the message to answer with (``None`` for the entry's own)."""
+    entry = await tiered_cache.aget(cache_key)
+    if _is_entry(entry):
+        if is_stale(entry) or should_refresh_early(entry):
+            await _aschedule_refresh(cache_key, build, family, cached_message)
+        return entry, None
+
+    token = await _aacquire(cache_key)
+    if token is None:
+        entry = await _await_for(cache_key)
+        if entry is not None:
+            return entry, None
+        data, entry = await _abuild_entry(cache_key, build, family, cached_message)
+        return entry, _message(message, data)
+    try:
+        fresh = await cache.aget(cache_key)
+        if _is_entry(fresh):
+            return fresh, None
+        data, entry = await _abuild_entry(cache_key, build, family, cached_message)
+        return entry, _message(message, data)
+    finally:
+        await _arelease(cache_key, token)
+
+
+async def acached_or_build(cache_key, build, family, message, cached_message, extra=None, if_none_match=None):
+    """
+    ``cached_or_build`` for async views.  ``build``, and ``extra`` when it is
+    callable, are coroutine functions.
+    """
+    entry, message = await _aentry(cache_key, build, family, message, cached_message)
+    if callable(extra):
+        extra = await extra()
+    return entry_response(entry, message=message, extra=extra, if_none_match=if_none_match)
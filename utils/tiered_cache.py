@@ -0,0 +1,200 @@
+"""
+Two-tier cache: a small in-process LRU/TTL tier in front of the shared Redis cache.
+
+Hot keys (the tag list, generation counters) are then served from worker memory
+without a Redis round trip or unpickling.  Deletes and generation bumps are
+published on a Redis pub/sub channel and every worker evicts those keys from its
+local tier; the local TTL bounds staleness if a message is ever missed.
+
+Values in the local tier are shared between requests, treat them as read-only.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def get_redis_client():
+    """
+    Raw redis client behind the default cache, or ``None`` when the cache is not
+    django-redis (e.g. locmem in tests) so callers can fall back to the cache API.
+    """
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        return None
+
+
+class LocalLRUCache:
+    """Thread-safe, size-bounded LRU where every entry also carries an expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredCache:
+
+    def __init__(self):
+        self._local = None
+        self._listener_lock = threading.Lock()
+        self._listener_started = False
+        self.stats = {"local": {"hits": 0, "misses": 0}, "redis": {"hits": 0, "misses": 0}}
+
+    @property
+    def options(self) -> dict:
+        return settings.LOCAL_CACHE
+
+    @property
+    def local(self):
+        if not self.options["ENABLED"]:
+            return None
+        if self._local is None:
+            self._local = LocalLRUCache(self.options["MAX_ENTRIES"])
+        self._ensure_listener()
+        return self._local
+
+    def _local_ttl(self, timeout) -> float:
+        ttl = self.options["TTL"]
+        return ttl if timeout is None else min(ttl, timeout)
+
+    def _count(self, tier: str, hit: bool) -> None:
+        self.stats[tier]["hits" if hit else "misses"] += 1
+
+    def get(self, key, default=None):
+        local = self.local
+        if local is not None:
+            value = local.get(key)
+            self._count("local", value is not _MISSING)
+            if value is not _MISSING:
+                return value
+
+        value = cache.get(key, _MISSING)
+        self._count("redis", value is not _MISSING)
+        if value is _MISSING:
+            return default
+        if local is not None:
+            local.set(key, value, self.options["TTL"])
+        return value
+
+    async def aget(self, key, default=None):
+        local = self.local
+        if local is not None:
+            value = local.get(key)
+            self._count("local", value is not _MISSING)
+            if value is not _MISSING:
+                return value
+
+        value = await cache.aget(key, _MISSING)
+        self._count("redis", value is not _MISSING)
+        if value is _MISSING:
+            return default
+        if local is not None:
+            local.set(key, value, self.options["TTL"])
+        return value
+
+    def set(self, key, value, timeout=None) -> None:
+        cache.set(key, value, timeout=timeout)
+        if self.local is not None:
+            self.local.set(key, value, self._local_ttl(timeout))
+
+    async def aset(self, key, value, timeout=None) -> None:
+        await cache.aset(key, value, timeout=timeout)
+        if self.local is not None:
+            self.local.set(key, value, self._local_ttl(timeout))
+
+    def delete_many(self, keys) -> None:
+        cache.delete_many(keys)
+        self.evict(keys)
+
+    def evict(self, keys) -> None:
+        """Drop ``keys`` from the local tier of every worker, Redis itself is untouched."""
+        keys = list(keys)
+        if not keys or self.local is None:
+            return
+        self.local.delete_many(keys)
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.publish(self.options["CHANNEL"], json.dumps(keys))
+        except Exception as e:
+            logger.warning(f"Could not publish cache invalidation for {keys}: {e}")
+
+    def forget_local(self, keys) -> None:
+        """Drop ``keys`` from this worker's local tier only."""
+        if self._local is not None:
+            self._local.delete_many(keys)
+
+    def clear_local(self) -> None:
+        if self._local is not None:
+            self._local.clear()
+
+    def reset_stats(self) -> None:
+        for counters in self.stats.values():
+            counters.update(hits=0, misses=0)
+
+    def _ensure_listener(self) -> None:
+        if self._listener_started:
+            return
+        with self._listener_lock:
+            if self._listener_started:
+                return
+            self._listener_started = True
+            if get_redis_client() is None:
+                return
+            threading.Thread(target=self._listen, name="tiered-cache-invalidation", daemon=True).start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.options["CHANNEL"])
+                # Anything published while we were not subscribed is lost.
+                self._local.clear()
+                for message in pubsub.listen():
+                    self._local.delete_many(json.loads(message["data"]))
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener lost its connection: {e}")
+                time.sleep(1)
+
+
+tiered_cache = TieredCache()